@@ -2,11 +2,17 @@
 PayLoad - Autonomous Payment Rails for Drones
 Flask API for drone micropayment simulation
 """
-from flask import Flask, jsonify, request
+from flask import Flask, Response, g, jsonify, request
 from flask_cors import CORS
 from dotenv import load_dotenv
+import os
+import atexit
+import math
+import signal
 import time
 import threading
+from bisect import bisect_right
+from itertools import groupby
 
 load_dotenv()
 
@@ -15,9 +21,35 @@ CORS(app)
 
 # Import our Solana client
 from solana_client import get_client
+from flight_store import get_store
+from geo import ZoneIndex
+from profiler import get_profiler
+from payload_sdk.recording import CallTimer, process_path
+from telemetry import (
+    BINARY_CONTENT_TYPE, TelemetryError, decode_batch, parse_json_batch,
+    decode_geo_batch, parse_json_geo_batch
+)
 
-# Track demo state
-demo_state = {
+# Number of worker processes serving this app (gunicorn.conf.py sets it
+# from the real worker count). More than one needs a shared flight store.
+WEB_CONCURRENCY = int(os.getenv('WEB_CONCURRENCY', '1'))
+if WEB_CONCURRENCY > 1 and not os.getenv('FLIGHT_STORE_PATH'):
+    raise RuntimeError("WEB_CONCURRENCY > 1 requires FLIGHT_STORE_PATH for shared flight state")
+
+# Flight state lives in the flight store (shared across workers when
+# FLIGHT_STORE_PATH is set). Flight IDs are namespaced per route.
+DEMO_FLIGHT = "demo"
+FLEET_PREFIX = "fleet:"
+GEO_PREFIX = "geo:"
+
+# Fleet and geo flights are dropped this long after their last accepted
+# report; the next report with the same ID then starts a new flight
+FLIGHT_RETENTION = float(os.getenv('FLIGHT_RETENTION_SECONDS', '3600'))
+# Seconds between sweeps of expired flights, per process
+EXPIRE_INTERVAL = 60
+
+# Demo status before the first start
+IDLE_DEMO_STATE = {
     "running": False,
     "drone_position": 0,
     "payments": [],
@@ -79,6 +111,351 @@ WAYPOINTS = [
 ]
 
 
+# Geospatial zones for fleet flights reporting lat/lon/alt
+# Altitudes in meters above ground, radii in meters
+GEO_ZONES = [
+    {
+        "shape": "polygon",
+        "points": [[30.2600, -97.7550], [30.2600, -97.7350], [30.2700, -97.7350], [30.2700, -97.7550]],
+        "min_alt": 30,
+        "max_alt": 120,
+        "type": "payment",
+        "name": "Airspace Zone A",
+        "amount": 0.003,
+        "description": "FAA airspace access fee"
+    },
+    {
+        "shape": "polygon",
+        "points": [[30.2700, -97.7480], [30.2700, -97.7440], [30.2850, -97.7440], [30.2850, -97.7480]],
+        "min_alt": 60,
+        "max_alt": 120,
+        "type": "payment",
+        "name": "Airspace Zone B",
+        "amount": 0.004,
+        "description": "Commercial corridor access"
+    },
+    {
+        "shape": "circle",
+        "center": [30.2860, -97.7460],
+        "radius": 40,
+        "max_alt": 30,
+        "type": "payment",
+        "name": "Landing Pad",
+        "amount": 0.05,
+        "description": "Rooftop pad reservation"
+    },
+    {
+        "shape": "circle",
+        "center": [30.2860, -97.7460],
+        "radius": 10,
+        "max_alt": 5,
+        "type": "payment",
+        "name": "Charging",
+        "amount": 0.12,
+        "description": "Battery top-up"
+    },
+    {
+        "shape": "circle",
+        "center": [30.2900, -97.7400],
+        "radius": 25,
+        "max_alt": 5,
+        "type": "receive",
+        "name": "Delivery Complete",
+        "amount": 5.00,
+        "description": "Payment received for delivery"
+    }
+]
+
+zone_index = ZoneIndex(GEO_ZONES)
+
+# Sorted waypoint positions for O(log n) crossing lookup
+WAYPOINT_POSITIONS = [w["position"] for w in WAYPOINTS]
+
+
+def new_flight_state():
+    """Fresh state for a flight starting at position 0"""
+    return {
+        "running": True,
+        "drone_position": 0,
+        "payments": [],
+        "failed_payments": [],
+        "unsettled": [],
+        "total_paid": 0,
+        "total_received": 0,
+        "start_time": time.time(),
+        "last_report": 0,
+        "last_seen": time.time()
+    }
+
+
+def crossed_waypoints(old_position, new_position):
+    """Waypoints with old_position < position <= new_position"""
+    if new_position <= old_position:
+        return []
+    lo = bisect_right(WAYPOINT_POSITIONS, old_position)
+    hi = bisect_right(WAYPOINT_POSITIONS, new_position)
+    return WAYPOINTS[lo:hi]
+
+
+def new_geo_flight_state():
+    """Fresh state for a geo flight that hasn't reported a point yet"""
+    state = new_flight_state()
+    state["last_point"] = None
+    return state
+
+
+def payment_record_for(waypoint, client):
+    """Pay or collect for a crossed waypoint and return the payment record"""
+    if waypoint["type"] == "payment":
+        result = client.send_micropayment(
+            waypoint["amount"],
+            waypoint["name"]
+        )
+        return {
+            "timestamp": time.time(),
+            "waypoint": waypoint["name"],
+            "amount": waypoint["amount"],
+            "type": "debit",
+            "description": waypoint["description"],
+            "tx": result
+        }
+
+    # Receiving payment for delivery
+    result = client.receive_micropayment(
+        waypoint["amount"],
+        waypoint["name"]
+    )
+    return {
+        "timestamp": time.time(),
+        "waypoint": waypoint["name"],
+        "amount": waypoint["amount"],
+        "type": "credit",
+        "description": waypoint["description"],
+        "tx": result
+    }
+
+
+def settle_waypoints(flight_id, waypoints, client):
+    """
+    Settle waypoints claimed by a flight and record them on its state.
+    Payments happen outside the store transaction so slow RPCs don't
+    hold the lock. Failed payments are kept out of the totals and their
+    waypoints queued for retry (see claim_unsettled).
+    Returns (payment records, flight totals).
+    """
+    records = [
+        (waypoint, payment_record_for(waypoint, client)) for waypoint in waypoints
+    ]
+
+    def record(state):
+        for waypoint, payment_record in records:
+            if not payment_record["tx"].get("success"):
+                state.setdefault("failed_payments", []).append(payment_record)
+                state.setdefault("unsettled", []).append(waypoint)
+                continue
+            state["payments"].append(payment_record)
+            if payment_record["type"] == "debit":
+                state["total_paid"] += payment_record["amount"]
+            else:
+                state["total_received"] += payment_record["amount"]
+        return {
+            "position": state["drone_position"],
+            "total_paid": state["total_paid"],
+            "total_received": state["total_received"],
+            "unsettled": [w["name"] for w in state.get("unsettled", [])],
+            "complete": state.get("complete", False)
+        }
+
+    return [r for _, r in records], get_store().update(flight_id, record)
+
+
+def claim_unsettled(state):
+    """
+    Take the waypoints whose payment failed so the caller retries them.
+    Runs inside a store transaction like the claim functions, so only one
+    request retries each waypoint.
+    """
+    return state.pop("unsettled", None) or []
+
+
+def claim_advance(state, new_position):
+    """
+    Move a flight forward to new_position and return the waypoints crossed.
+    Runs inside a store transaction, so concurrent requests claim disjoint
+    stretches of the route and each waypoint is charged at most once.
+    Positions never move backwards.
+    """
+    # Cap at 100
+    new_position = max(state["drone_position"], min(100, new_position))
+
+    crossed = crossed_waypoints(state["drone_position"], new_position)
+
+    # Update position
+    state["drone_position"] = new_position
+
+    # Check if flight complete
+    if new_position >= 100:
+        state["running"] = False
+        state["complete"] = True
+
+    return crossed
+
+
+def claim_geo_advance(state, point):
+    """
+    Move a geo flight to point (lat, lon, alt) and return the zones the
+    path from its last reported point enters.
+    """
+    last_point = state["last_point"]
+
+    # First report is takeoff; nothing has been entered yet
+    if last_point is None:
+        state["last_point"] = point
+        return []
+
+    # Only move the flight once crossing detection has succeeded
+    entered = zone_index.entered(last_point, point)
+    state["last_point"] = point
+    if any(zone["type"] == "receive" for zone in entered):
+        state["running"] = False
+        state["complete"] = True
+    return entered
+
+
+def claim_reports(state, reports, claim, new_state):
+    """
+    Apply one flight's (position, timestamp) reports in timestamp order.
+    A flight with no accepted report for FLIGHT_RETENTION seconds is
+    replaced by new_state(), so its ID can fly again. Reports older than
+    the last accepted one are "stale"; reports for a completed flight are
+    "finished". Both are dropped. Waypoints whose payment failed earlier
+    are retried first while the flight is running.
+    Returns (waypoints claimed, {"stale": n, "finished": n}).
+    """
+    now = time.time()
+    if now - state.get("last_seen", now) > FLIGHT_RETENTION:
+        # Expired but not swept yet
+        state.clear()
+        state.update(new_state())
+
+    crossed = claim_unsettled(state) if state["running"] else []
+    ignored = {"stale": 0, "finished": 0}
+    for position, timestamp in reports:
+        if not state["running"]:
+            ignored["finished"] += 1
+            continue
+        if timestamp <= state["last_report"]:
+            ignored["stale"] += 1
+            continue
+        state["last_report"] = timestamp
+        state["last_seen"] = now
+        crossed.extend(claim(state, position))
+    return crossed, ignored
+
+
+_last_expiry = 0.0
+
+
+def expire_flights(store):
+    """
+    Drop fleet and geo flights idle for FLIGHT_RETENTION seconds, at most
+    every EXPIRE_INTERVAL. Reports a flight ignores don't change its state,
+    so they don't keep it alive.
+    """
+    global _last_expiry
+    now = time.time()
+    if now - _last_expiry < EXPIRE_INTERVAL:
+        return
+    _last_expiry = now
+    for prefix in (FLEET_PREFIX, GEO_PREFIX):
+        store.expire(prefix, now - FLIGHT_RETENTION)
+
+
+def ingest_batch(updates, prefix, new_state, claim):
+    """
+    Run a decoded telemetry batch through the flight store, one
+    transaction per flight, and settle whatever it triggers.
+    Dropped reports are listed per flight under "ignored".
+    """
+    # One pass per flight in timestamp order
+    updates.sort(key=lambda u: (u[0], u[2]))
+
+    store = get_store()
+    client = get_client()
+    expire_flights(store)
+    triggered_payments = []
+    ignored = []
+    totals = {"stale": 0, "finished": 0}
+
+    for flight_id, group in groupby(updates, key=lambda u: u[0]):
+        reports = [(position, timestamp) for _, position, timestamp in group]
+        crossed, flight_ignored = store.update(
+            prefix + flight_id,
+            lambda state: claim_reports(state, reports, claim, new_state),
+            default=new_state
+        )
+        if flight_ignored["stale"] or flight_ignored["finished"]:
+            ignored.append({"flight_id": flight_id, **flight_ignored})
+            totals["stale"] += flight_ignored["stale"]
+            totals["finished"] += flight_ignored["finished"]
+        if crossed:
+            records, _ = settle_waypoints(prefix + flight_id, crossed, client)
+            triggered_payments.extend({"flight_id": flight_id, **r} for r in records)
+
+    return jsonify({
+        "processed": len(updates) - totals["stale"] - totals["finished"],
+        "stale": totals["stale"],
+        "finished": totals["finished"],
+        "ignored": ignored,
+        "triggered_payments": triggered_payments
+    })
+
+
+profiler = get_profiler()
+
+
+@app.before_request
+def profile_begin():
+    # Only an attribute check while profiling is off
+    if profiler.active and not request.path.startswith('/api/admin/'):
+        profiler.begin_request(request.method, request.path)
+
+
+@app.after_request
+def profile_end(response):
+    if profiler.active:
+        profiler.end_request(response.status_code)
+    return response
+
+
+# End-to-end endpoint timings, e.g. while replaying recorded RPC traffic,
+# saved at exit (one file per worker pid) for comparison against a baseline run
+RPC_TIMINGS_PATH = os.getenv('RPC_TIMINGS_PATH')
+call_timer = CallTimer() if RPC_TIMINGS_PATH else None
+if call_timer is not None:
+    atexit.register(lambda: call_timer.save(process_path(RPC_TIMINGS_PATH)))
+
+
+@app.before_request
+def timing_begin():
+    if call_timer is not None:
+        g.timing_start = time.perf_counter()
+
+
+@app.after_request
+def timing_end(response):
+    if call_timer is not None and 'timing_start' in g:
+        error = None if response.status_code < 500 else f"HTTP {response.status_code}"
+        call_timer.add(f"{request.method} {request.path}", g.timing_start, error)
+    return response
+
+
+def admin_authorized():
+    """Admin endpoints are disabled unless ADMIN_TOKEN is set"""
+    token = os.getenv('ADMIN_TOKEN')
+    return bool(token) and request.headers.get('X-Admin-Token') == token
+
+
 @app.route('/api/health', methods=['GET'])
 def health():
     """Health check endpoint"""
@@ -95,16 +472,7 @@ def wallet_info():
 @app.route('/api/demo/start', methods=['POST'])
 def start_demo():
     """Start a new drone delivery demo"""
-    global demo_state
-    
-    demo_state = {
-        "running": True,
-        "drone_position": 0,
-        "payments": [],
-        "total_paid": 0,
-        "total_received": 0,
-        "start_time": time.time()
-    }
+    get_store().put(DEMO_FLIGHT, new_flight_state())
     
     return jsonify({
         "success": True,
@@ -116,8 +484,11 @@ def start_demo():
 @app.route('/api/demo/stop', methods=['POST'])
 def stop_demo():
     """Stop the current demo"""
-    global demo_state
-    demo_state["running"] = False
+    def stop(state):
+        if state is not None:
+            state["running"] = False
+
+    get_store().update(DEMO_FLIGHT, stop)
     
     return jsonify({
         "success": True,
@@ -128,7 +499,7 @@ def stop_demo():
 @app.route('/api/demo/status', methods=['GET'])
 def demo_status():
     """Get current demo status"""
-    return jsonify(demo_state)
+    return jsonify(get_store().get(DEMO_FLIGHT) or IDLE_DEMO_STATE)
 
 
 @app.route('/api/demo/advance', methods=['POST'])
@@ -137,80 +508,105 @@ def advance_drone():
     Advance the drone position.
     Called by frontend to move drone and trigger payments.
     """
-    global demo_state
-    
-    if not demo_state.get("running"):
-        return jsonify({"error": "Demo not running"}), 400
-    
     # Get new position from request or auto-advance
-    data = request.json or {}
-    new_position = data.get("position", demo_state["drone_position"] + 5)
-    
-    # Cap at 100
-    new_position = min(100, new_position)
-    
-    # Check for waypoints crossed
-    triggered_payments = []
-    client = get_client()
+    data = request.get_json(silent=True) or {}
+    position = data.get("position") if isinstance(data, dict) else None
+    if position is not None:
+        try:
+            position = float(position)
+        except (TypeError, ValueError):
+            position = math.nan
+        if not (math.isfinite(position) and position >= 0):
+            return jsonify({"error": "position must be a non-negative number"}), 400
     
-    for waypoint in WAYPOINTS:
-        wp_pos = waypoint["position"]
-        # If we crossed this waypoint
-        if demo_state["drone_position"] < wp_pos <= new_position:
-            # Process payment
-            if waypoint["type"] == "payment":
-                result = client.send_micropayment(
-                    waypoint["amount"],
-                    waypoint["name"]
-                )
-                payment_record = {
-                    "timestamp": time.time(),
-                    "waypoint": waypoint["name"],
-                    "amount": waypoint["amount"],
-                    "type": "debit",
-                    "description": waypoint["description"],
-                    "tx": result
-                }
-                demo_state["payments"].append(payment_record)
-                demo_state["total_paid"] += waypoint["amount"]
-                triggered_payments.append(payment_record)
-                
-            elif waypoint["type"] == "receive":
-                # Receiving payment for delivery
-                payment_record = {
-                    "timestamp": time.time(),
-                    "waypoint": waypoint["name"],
-                    "amount": waypoint["amount"],
-                    "type": "credit",
-                    "description": waypoint["description"],
-                    "tx": {
-                        "success": True,
-                        "signature": f"delivery_{int(time.time())}",
-                        "simulated": True
-                    }
-                }
-                demo_state["payments"].append(payment_record)
-                demo_state["total_received"] += waypoint["amount"]
-                triggered_payments.append(payment_record)
+    def claim(state):
+        if state is None or not state.get("running"):
+            return None
+        retry = claim_unsettled(state)
+        return retry + claim_advance(
+            state, state["drone_position"] + 5 if position is None else position
+        )
     
-    # Update position
-    demo_state["drone_position"] = new_position
+    crossed = get_store().update(DEMO_FLIGHT, claim)
+    if crossed is None:
+        return jsonify({"error": "Demo not running"}), 400
     
-    # Check if demo complete
-    if new_position >= 100:
-        demo_state["running"] = False
-        demo_state["complete"] = True
+    triggered_payments, flight = settle_waypoints(DEMO_FLIGHT, crossed, get_client())
     
     return jsonify({
-        "position": new_position,
+        "position": flight["position"],
         "triggered_payments": triggered_payments,
-        "total_paid": round(demo_state["total_paid"], 4),
-        "total_received": round(demo_state["total_received"], 2),
-        "net": round(demo_state["total_received"] - demo_state["total_paid"], 4),
-        "complete": demo_state.get("complete", False)
+        "total_paid": round(flight["total_paid"], 4),
+        "total_received": round(flight["total_received"], 2),
+        "net": round(flight["total_received"] - flight["total_paid"], 4),
+        "unsettled": flight["unsettled"],
+        "complete": flight["complete"]
     })
 
 
+@app.route('/api/telemetry', methods=['POST'])
+def ingest_telemetry():
+    """
+    Batched position reports for many flights in one request.
+    Body is a binary batch (see telemetry.py) with Content-Type
+    application/octet-stream, or JSON {"updates": [...]} as a fallback.
+    Returns only the payments triggered by the batch.
+    """
+    try:
+        if request.mimetype == BINARY_CONTENT_TYPE:
+            updates = decode_batch(request.get_data(cache=False))
+        else:
+            updates = parse_json_batch(request.get_json(silent=True))
+    except TelemetryError as e:
+        return jsonify({"error": str(e)}), 400
+
+    return ingest_batch(updates, FLEET_PREFIX, new_flight_state, claim_advance)
+
+
+@app.route('/api/geo/telemetry', methods=['POST'])
+def ingest_geo_telemetry():
+    """
+    Batched lat/lon/alt reports for many flights in one request.
+    Body is a binary geo batch (see telemetry.py) with Content-Type
+    application/octet-stream, or JSON {"updates": [...]} as a fallback.
+    Each segment between consecutive reports is tested against the zone
+    index; returns only the payments for zones entered.
+    """
+    try:
+        if request.mimetype == BINARY_CONTENT_TYPE:
+            updates = decode_geo_batch(request.get_data(cache=False))
+        else:
+            updates = parse_json_geo_batch(request.get_json(silent=True))
+    except TelemetryError as e:
+        return jsonify({"error": str(e)}), 400
+
+    return ingest_batch(updates, GEO_PREFIX, new_geo_flight_state, claim_geo_advance)
+
+
+@app.route('/api/geo/zones', methods=['GET'])
+def get_geo_zones():
+    """Get all geospatial zones"""
+    return jsonify({"zones": GEO_ZONES})
+
+
+@app.route('/api/geo/flights/<flight_id>', methods=['GET'])
+def geo_flight_status(flight_id):
+    """Get status of a geo flight reported via telemetry"""
+    state = get_store().get(GEO_PREFIX + flight_id)
+    if state is None:
+        return jsonify({"error": "Unknown flight"}), 404
+    return jsonify(state)
+
+
+@app.route('/api/flights/<flight_id>', methods=['GET'])
+def flight_status(flight_id):
+    """Get status of a fleet flight reported via telemetry"""
+    state = get_store().get(FLEET_PREFIX + flight_id)
+    if state is None:
+        return jsonify({"error": "Unknown flight"}), 404
+    return jsonify(state)
+
+
 @app.route('/api/pay', methods=['POST'])
 def make_payment():
     """
@@ -234,6 +630,72 @@ def make_payment():
         return jsonify(result), 500
 
 
+@app.route('/api/admin/profile', methods=['POST'])
+def start_profile():
+    """
+    Start a sampling session.
+    Body: {"duration": seconds, "requests": count, "interval_ms": 5}
+    The session ends at whichever limit is hit first. Sessions are per
+    process; under gunicorn this profiles only the worker that served the
+    request (its pid is in the response).
+    """
+    if not admin_authorized():
+        return jsonify({"error": "Forbidden"}), 403
+    
+    data = request.get_json(silent=True) or {}
+    try:
+        profiler.start(
+            duration=data.get("duration"),
+            requests=data.get("requests"),
+            interval=float(data.get("interval_ms", 5)) / 1000
+        )
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+    except RuntimeError as e:
+        return jsonify({"error": str(e)}), 409
+    
+    return jsonify({"success": True, **profiler.status()})
+
+
+@app.route('/api/admin/profile', methods=['GET'])
+def profile_status():
+    """Session status and per-request wall/CPU breakdowns"""
+    if not admin_authorized():
+        return jsonify({"error": "Forbidden"}), 403
+    return jsonify(profiler.status())
+
+
+@app.route('/api/admin/profile', methods=['DELETE'])
+def stop_profile():
+    """Stop the running session early"""
+    if not admin_authorized():
+        return jsonify({"error": "Forbidden"}), 403
+    profiler.stop()
+    return jsonify({"success": True, **profiler.status()})
+
+
+@app.route('/api/admin/profile/stacks', methods=['GET'])
+def profile_stacks():
+    """Collapsed stacks for flamegraph.pl / speedscope"""
+    if not admin_authorized():
+        return jsonify({"error": "Forbidden"}), 403
+    return Response(profiler.collapsed(), mimetype='text/plain')
+
+
+def profile_on_signal(signum, frame):
+    """
+    SIGUSR1 starts a PROFILE_SECONDS session written to PROFILE_OUTPUT.
+    Dev server only; gunicorn uses SIGUSR1 to reopen its log files.
+    """
+    try:
+        profiler.start(
+            duration=float(os.getenv('PROFILE_SECONDS', '30')),
+            output=os.getenv('PROFILE_OUTPUT', f'payload-{os.getpid()}.collapsed')
+        )
+    except RuntimeError:
+        pass
+
+
 @app.route('/api/waypoints', methods=['GET'])
 def get_waypoints():
     """Get all waypoints for the demo route"""
@@ -261,4 +723,13 @@ if __name__ == '__main__':
     print(f"  Balance: {info['sol_balance']} SOL")
     print()
     
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    if hasattr(signal, 'SIGUSR1'):
+        signal.signal(signal.SIGUSR1, profile_on_signal)
+        print(f"  Profile: kill -USR1 {os.getpid()}")
+        print()
+    
+    # Single-process dev server; for several workers run gunicorn from
+    # backend/ (see gunicorn.conf.py):
+    #   FLIGHT_STORE_PATH=payload_flights.db gunicorn -w 4 app:app
+    # No reloader, so this process (the one SIGUSR1 reaches) serves requests
+    app.run(host='0.0.0.0', port=5000, debug=True, use_reloader=False)
@@ -0,0 +1,158 @@
+"""
+Flight state storage for PayLoad
+In-process by default; SQLite-backed so several worker processes can share flights
+"""
+import copy
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+class MemoryFlightStore:
+    """Flight states in a dict, guarded by a lock. Single process only."""
+
+    def __init__(self):
+        self._flights = {}
+        self._updated = {}
+        self._lock = threading.Lock()
+
+    def get(self, flight_id):
+        """Snapshot of a flight's state, or None"""
+        with self._lock:
+            state = self._flights.get(flight_id)
+            return copy.deepcopy(state) if state is not None else None
+
+    def put(self, flight_id, state):
+        """Create or replace a flight's state"""
+        with self._lock:
+            self._flights[flight_id] = copy.deepcopy(state)
+            self._updated[flight_id] = time.time()
+
+    def update(self, flight_id, fn, default=None):
+        """
+        Atomically apply fn(state) to a flight and return its result.
+        fn mutates state in place. If the flight doesn't exist, default()
+        creates it when given; otherwise fn receives None and nothing is stored.
+        fn works on a copy that is only stored if it returns, so an
+        exception leaves the flight untouched (as SqliteFlightStore's
+        rollback does).
+        """
+        with self._lock:
+            current = self._flights.get(flight_id)
+            if current is not None:
+                state = copy.deepcopy(current)
+            else:
+                state = default() if default is not None else None
+            result = fn(state)
+            # Unchanged states keep their update time (see expire)
+            if state is not None and state != current:
+                self._flights[flight_id] = state
+                self._updated[flight_id] = time.time()
+            return result
+
+    def expire(self, prefix, before):
+        """Delete flights under prefix last changed before the given time"""
+        with self._lock:
+            expired = [
+                flight_id for flight_id, updated in self._updated.items()
+                if updated < before and flight_id.startswith(prefix)
+            ]
+            for flight_id in expired:
+                del self._flights[flight_id]
+                del self._updated[flight_id]
+            return len(expired)
+
+
+class SqliteFlightStore:
+    """
+    Flight states as JSON rows in a local SQLite database.
+
+    Every worker process opens the same file. update() runs inside a
+    BEGIN IMMEDIATE transaction, which takes the database write lock
+    before reading, so two workers can never advance the same flight from
+    the same starting position.
+    """
+
+    def __init__(self, path, timeout=30.0):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS flights ("
+            "id TEXT PRIMARY KEY, state TEXT NOT NULL, updated REAL NOT NULL DEFAULT 0)"
+        )
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(flights)")]
+        if "updated" not in columns:
+            conn.execute("ALTER TABLE flights ADD COLUMN updated REAL NOT NULL DEFAULT 0")
+        conn.execute("CREATE INDEX IF NOT EXISTS flights_updated ON flights (updated)")
+
+    def _conn(self):
+        # One connection per thread (and so per process after fork)
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, flight_id):
+        row = self._conn().execute(
+            "SELECT state FROM flights WHERE id = ?", (flight_id,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, flight_id, state):
+        self._conn().execute(
+            "INSERT OR REPLACE INTO flights (id, state, updated) VALUES (?, ?, ?)",
+            (flight_id, json.dumps(state), time.time())
+        )
+
+    def update(self, flight_id, fn, default=None):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT state FROM flights WHERE id = ?", (flight_id,)
+            ).fetchone()
+            if row:
+                state = json.loads(row[0])
+            else:
+                state = default() if default is not None else None
+
+            result = fn(state)
+
+            # Unchanged states are not rewritten and keep their update time
+            if state is not None:
+                data = json.dumps(state)
+                if not row or data != row[0]:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO flights (id, state, updated) VALUES (?, ?, ?)",
+                        (flight_id, data, time.time())
+                    )
+            conn.execute("COMMIT")
+            return result
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def expire(self, prefix, before):
+        return self._conn().execute(
+            "DELETE FROM flights WHERE updated < ? AND substr(id, 1, ?) = ?",
+            (before, len(prefix), prefix)
+        ).rowcount
+
+
+# Singleton instance
+_store = None
+
+def get_store():
+    global _store
+    if _store is None:
+        path = os.getenv('FLIGHT_STORE_PATH')
+        _store = SqliteFlightStore(path) if path else MemoryFlightStore()
+    return _store
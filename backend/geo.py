@@ -0,0 +1,289 @@
+"""
+Geospatial waypoints for PayLoad
+Airspace zones, corridors and pads as polygons or radii with altitude bands,
+held in a uniform grid index for flight-path crossing detection
+"""
+import math
+
+EARTH_RADIUS_M = 6371000.0
+
+
+class Projection:
+    """
+    Equirectangular projection to local meters around an origin.
+    Accurate enough at city scale, which is all a flight's zone set covers.
+    """
+
+    def __init__(self, lat0, lon0):
+        self.lat0 = lat0
+        self.lon0 = lon0
+        self._kx = math.radians(1) * EARTH_RADIUS_M * math.cos(math.radians(lat0))
+        self._ky = math.radians(1) * EARTH_RADIUS_M
+
+    def to_xy(self, lat, lon):
+        return ((lon - self.lon0) * self._kx, (lat - self.lat0) * self._ky)
+
+
+def _orient(ax, ay, bx, by, cx, cy):
+    return (bx - ax) * (cy - ay) - (by - ay) * (cx - ax)
+
+
+def _on_segment(px, py, qx, qy, rx, ry):
+    return min(px, qx) <= rx <= max(px, qx) and min(py, qy) <= ry <= max(py, qy)
+
+
+def _segments_intersect(ax, ay, bx, by, cx, cy, dx, dy):
+    d1 = _orient(cx, cy, dx, dy, ax, ay)
+    d2 = _orient(cx, cy, dx, dy, bx, by)
+    d3 = _orient(ax, ay, bx, by, cx, cy)
+    d4 = _orient(ax, ay, bx, by, dx, dy)
+    if d1 * d2 < 0 and d3 * d4 < 0:
+        return True
+    # Touching / collinear cases
+    return (
+        (d1 == 0 and _on_segment(cx, cy, dx, dy, ax, ay)) or
+        (d2 == 0 and _on_segment(cx, cy, dx, dy, bx, by)) or
+        (d3 == 0 and _on_segment(ax, ay, bx, by, cx, cy)) or
+        (d4 == 0 and _on_segment(ax, ay, bx, by, dx, dy))
+    )
+
+
+class Zone:
+    """Base zone: a 2D footprint plus an altitude band (meters)"""
+
+    def __init__(self, waypoint, min_alt=0.0, max_alt=float("inf")):
+        self.waypoint = waypoint
+        self.min_alt = min_alt
+        self.max_alt = max_alt
+
+    def contains(self, x, y, alt):
+        return self.min_alt <= alt <= self.max_alt and self.contains_xy(x, y)
+
+    def crosses(self, ax, ay, az, bx, by, bz):
+        """Whether the 3D segment a->b passes through the zone"""
+        # Clip the segment to the part inside the altitude band
+        if az == bz:
+            if not self.min_alt <= az <= self.max_alt:
+                return False
+            t0, t1 = 0.0, 1.0
+        else:
+            t0 = (self.min_alt - az) / (bz - az)
+            t1 = (self.max_alt - az) / (bz - az)
+            if t0 > t1:
+                t0, t1 = t1, t0
+            t0, t1 = max(t0, 0.0), min(t1, 1.0)
+            if t0 > t1:
+                return False
+
+        dx, dy = bx - ax, by - ay
+        return self.crosses_xy(ax + dx * t0, ay + dy * t0, ax + dx * t1, ay + dy * t1)
+
+
+class CircleZone(Zone):
+    """Zone within radius meters of a center (pads, chargers)"""
+
+    def __init__(self, waypoint, x, y, radius, **band):
+        super().__init__(waypoint, **band)
+        self.x, self.y, self.radius = x, y, radius
+        self.bbox = (x - radius, y - radius, x + radius, y + radius)
+
+    def contains_xy(self, x, y):
+        return (x - self.x) ** 2 + (y - self.y) ** 2 <= self.radius ** 2
+
+    def crosses_xy(self, ax, ay, bx, by):
+        dx, dy = bx - ax, by - ay
+        length2 = dx * dx + dy * dy
+        t = 0.0 if length2 == 0 else max(0.0, min(1.0, ((self.x - ax) * dx + (self.y - ay) * dy) / length2))
+        return self.contains_xy(ax + dx * t, ay + dy * t)
+
+
+class PolygonZone(Zone):
+    """Zone inside a simple polygon (airspace sectors, corridors)"""
+
+    def __init__(self, waypoint, points, **band):
+        super().__init__(waypoint, **band)
+        if len(points) < 3:
+            raise ValueError(f"Polygon zone {waypoint.get('name')!r} needs at least 3 points")
+        self.points = points
+        self.edges = list(zip(points, points[1:] + points[:1]))
+        xs = [p[0] for p in points]
+        ys = [p[1] for p in points]
+        self.bbox = (min(xs), min(ys), max(xs), max(ys))
+
+    def contains_xy(self, x, y):
+        inside = False
+        for (x1, y1), (x2, y2) in self.edges:
+            if (y1 > y) != (y2 > y) and x < (x2 - x1) * (y - y1) / (y2 - y1) + x1:
+                inside = not inside
+        return inside
+
+    def crosses_xy(self, ax, ay, bx, by):
+        if self.contains_xy(ax, ay) or self.contains_xy(bx, by):
+            return True
+        return any(
+            _segments_intersect(ax, ay, bx, by, x1, y1, x2, y2)
+            for (x1, y1), (x2, y2) in self.edges
+        )
+
+
+class ZoneIndex:
+    """
+    Uniform grid over projected zone bounding boxes.
+
+    Each zone is registered in every cell its bounding box overlaps. A
+    flight segment is clipped to the extent of all zones and then walks
+    only the cells it passes through, so a query costs O(segment length /
+    cell size) however far a report jumps, and zones are only tested when
+    they share a cell with the path.
+
+    Waypoint dicts carry the usual type/name/amount/description plus
+    geometry in degrees and meters:
+        {"shape": "circle", "center": [lat, lon], "radius": 150, ...}
+        {"shape": "polygon", "points": [[lat, lon], ...], ...}
+    with optional "min_alt"/"max_alt" (meters).
+    """
+
+    def __init__(self, waypoints, origin=None, cell_size=250.0):
+        if not waypoints:
+            raise ValueError("ZoneIndex needs at least one zone")
+        if origin is None:
+            origin = _first_point(waypoints[0])
+
+        self.projection = Projection(*origin)
+        self.cell_size = cell_size
+        self.zones = [self._build_zone(wp) for wp in waypoints]
+        self._grid = {}
+        for zone_id, zone in enumerate(self.zones):
+            for cell in self._cells(*zone.bbox):
+                self._grid.setdefault(cell, []).append(zone_id)
+
+        # Bounding box of every zone; paths outside it can't enter anything
+        self.extent = (
+            min(zone.bbox[0] for zone in self.zones),
+            min(zone.bbox[1] for zone in self.zones),
+            max(zone.bbox[2] for zone in self.zones),
+            max(zone.bbox[3] for zone in self.zones)
+        )
+
+    def _build_zone(self, waypoint):
+        band = {
+            "min_alt": float(waypoint.get("min_alt", 0.0)),
+            "max_alt": float(waypoint.get("max_alt", float("inf")))
+        }
+        shape = waypoint.get("shape")
+        if shape == "circle":
+            x, y = self.projection.to_xy(*waypoint["center"])
+            return CircleZone(waypoint, x, y, float(waypoint["radius"]), **band)
+        if shape == "polygon":
+            points = [self.projection.to_xy(lat, lon) for lat, lon in waypoint["points"]]
+            return PolygonZone(waypoint, points, **band)
+        raise ValueError(f"Unknown zone shape {shape!r} for {waypoint.get('name')!r}")
+
+    def _cells(self, min_x, min_y, max_x, max_y):
+        size = self.cell_size
+        for cx in range(math.floor(min_x / size), math.floor(max_x / size) + 1):
+            for cy in range(math.floor(min_y / size), math.floor(max_y / size) + 1):
+                yield (cx, cy)
+
+    def _segment_cells(self, ax, ay, bx, by):
+        """Grid cells the segment a->b passes through, within the zone extent"""
+        clipped = _clip_segment(ax, ay, bx, by, self.extent)
+        if clipped is None:
+            return
+        ax, ay, bx, by = clipped
+
+        # Grid traversal (Amanatides & Woo)
+        size = self.cell_size
+        cx, cy = math.floor(ax / size), math.floor(ay / size)
+        end_x, end_y = math.floor(bx / size), math.floor(by / size)
+        dx, dy = bx - ax, by - ay
+        step_x = 1 if dx > 0 else -1
+        step_y = 1 if dy > 0 else -1
+        if dx:
+            t_max_x = ((cx + (step_x > 0)) * size - ax) / dx
+            t_delta_x = size / abs(dx)
+        else:
+            t_max_x = t_delta_x = math.inf
+        if dy:
+            t_max_y = ((cy + (step_y > 0)) * size - ay) / dy
+            t_delta_y = size / abs(dy)
+        else:
+            t_max_y = t_delta_y = math.inf
+
+        yield (cx, cy)
+        for _ in range(abs(end_x - cx) + abs(end_y - cy)):
+            if t_max_x < t_max_y:
+                cx += step_x
+                t_max_x += t_delta_x
+            else:
+                cy += step_y
+                t_max_y += t_delta_y
+            yield (cx, cy)
+
+    def _candidates(self, cells):
+        found = set()
+        for cell in cells:
+            found.update(self._grid.get(cell, ()))
+        return sorted(found)
+
+    def zones_at(self, lat, lon, alt):
+        """Waypoints whose zone contains the point"""
+        x, y = self.projection.to_xy(lat, lon)
+        return [
+            self.zones[i].waypoint
+            for i in self._candidates(self._cells(x, y, x, y))
+            if self.zones[i].contains(x, y, alt)
+        ]
+
+    def entered(self, start, end):
+        """
+        Waypoints whose zone the path start->end enters.
+        start and end are (lat, lon, alt). Zones already containing the
+        start point are not re-entered, so dwelling inside a zone is free.
+        """
+        ax, ay = self.projection.to_xy(start[0], start[1])
+        bx, by = self.projection.to_xy(end[0], end[1])
+        az, bz = start[2], end[2]
+
+        entered = []
+        for i in self._candidates(self._segment_cells(ax, ay, bx, by)):
+            zone = self.zones[i]
+            if zone.crosses(ax, ay, az, bx, by, bz) and not zone.contains(ax, ay, az):
+                entered.append(zone.waypoint)
+        return entered
+
+
+def valid_point(lat, lon, alt):
+    """Whether (lat, lon, alt) is a finite point on the globe"""
+    return (
+        math.isfinite(lat) and math.isfinite(lon) and math.isfinite(alt)
+        and -90 <= lat <= 90 and -180 <= lon <= 180
+    )
+
+
+def _clip_segment(ax, ay, bx, by, box):
+    """Clip segment a->b to box (Liang-Barsky); None if it misses"""
+    min_x, min_y, max_x, max_y = box
+    dx, dy = bx - ax, by - ay
+    t0, t1 = 0.0, 1.0
+    for p, q in ((-dx, ax - min_x), (dx, max_x - ax), (-dy, ay - min_y), (dy, max_y - ay)):
+        if p == 0:
+            if q < 0:
+                return None
+            continue
+        t = q / p
+        if p < 0:
+            if t > t1:
+                return None
+            t0 = max(t0, t)
+        else:
+            if t < t0:
+                return None
+            t1 = min(t1, t)
+    return (ax + dx * t0, ay + dy * t0, ax + dx * t1, ay + dy * t1)
+
+
+def _first_point(waypoint):
+    if waypoint.get("shape") == "circle":
+        return tuple(waypoint["center"])
+    return tuple(waypoint["points"][0])
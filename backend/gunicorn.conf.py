@@ -0,0 +1,19 @@
+"""
+Gunicorn settings for running the PayLoad API with several workers
+Loaded automatically when gunicorn is started from backend/:
+    FLIGHT_STORE_PATH=payload_flights.db gunicorn -w 4 app:app
+"""
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:5000")
+
+
+def on_starting(server):
+    """Refuse to start several workers without a shared flight store"""
+    workers = server.cfg.workers
+    if workers > 1 and not os.getenv("FLIGHT_STORE_PATH"):
+        raise SystemExit(
+            f"{workers} workers require FLIGHT_STORE_PATH for shared flight state"
+        )
+    # Let the app see the real worker count, however it was set (-w or env)
+    os.environ["WEB_CONCURRENCY"] = str(workers)
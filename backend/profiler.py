@@ -0,0 +1,213 @@
+"""
+On-demand sampling profiler for the PayLoad API
+Off by default; a session samples request threads for a set time or request count
+"""
+import math
+import numbers
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+
+# Leaf-most matching frame decides where a sample's time went
+PHASES = (
+    ("rpc", ("httpx", "httpcore", "solana/rpc", "ssl.py", "socket.py")),
+    ("signing", ("solana/transaction", "solders", "payload_sdk/keystore")),
+    ("serialization", ("json", "telemetry.py", "werkzeug/wrappers")),
+)
+
+
+def _classify(frame):
+    while frame is not None:
+        filename = frame.f_code.co_filename.replace(os.sep, "/")
+        for phase, markers in PHASES:
+            if any(marker in filename for marker in markers):
+                return phase
+        frame = frame.f_back
+    return "app"
+
+
+def _positive(value):
+    return (
+        isinstance(value, numbers.Real) and not isinstance(value, bool)
+        and math.isfinite(value) and value > 0
+    )
+
+
+def _collapse(root, frame):
+    # Module-qualified, so backend app.py and flask/app.py stay apart
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        module = frame.f_globals.get("__name__") or os.path.basename(code.co_filename)
+        stack.append(f"{module}:{getattr(code, 'co_qualname', code.co_name)}")
+        frame = frame.f_back
+    stack.append(root)
+    return ";".join(reversed(stack))
+
+
+class RequestProfile:
+    """Wall/CPU time and sampled phase breakdown for one request"""
+
+    def __init__(self, method, path):
+        self.method = method
+        self.path = path
+        self.samples = Counter()
+        self.wall_start = time.perf_counter()
+        self.cpu_start = time.thread_time()
+
+    def to_dict(self, status, interval):
+        return {
+            "method": self.method,
+            "path": self.path,
+            "status": status,
+            "wall_ms": round((time.perf_counter() - self.wall_start) * 1000, 3),
+            "cpu_ms": round((time.thread_time() - self.cpu_start) * 1000, 3),
+            "samples": sum(self.samples.values()),
+            "breakdown_ms": {
+                phase: round(count * interval * 1000, 3)
+                for phase, count in self.samples.items()
+            }
+        }
+
+
+class SamplingProfiler:
+    """
+    Samples the stacks of threads serving requests while a session is active.
+    State is per process: under several workers a session only covers the
+    worker that started it.
+
+    When no session is running the request hooks check one attribute and
+    return, and no sampler thread exists. Results are per-request records
+    plus collapsed stacks ("frame;frame;frame count" lines) that
+    flamegraph.pl, speedscope and similar tools read directly.
+    """
+
+    def __init__(self, max_records=1000):
+        self.active = False
+        self.interval = 0.005
+        self.stacks = Counter()
+        self.records = deque(maxlen=max_records)
+        self._requests = {}
+        self._lock = threading.Lock()
+        self._deadline = None
+        self._remaining = None
+        self._output = None
+        self._session = 0
+
+    def start(self, duration=None, requests=None, interval=0.005, output=None):
+        """
+        Start a session, discarding the previous session's results.
+        The session ends after duration seconds or requests completed
+        requests, whichever comes first, or on stop().
+        """
+        if duration is None and requests is None:
+            raise ValueError("Profiling session needs a duration or a request count")
+        if duration is not None and not _positive(duration):
+            raise ValueError("duration must be a positive number of seconds")
+        if requests is not None and not (
+            isinstance(requests, numbers.Integral) and not isinstance(requests, bool)
+            and requests >= 1
+        ):
+            raise ValueError("requests must be an integer >= 1")
+        if not _positive(interval):
+            raise ValueError("interval must be a positive number of seconds")
+
+        with self._lock:
+            if self.active:
+                raise RuntimeError("Profiling session already running")
+            self.interval = interval
+            self.stacks = Counter()
+            self.records.clear()
+            self._requests = {}
+            self._deadline = time.monotonic() + duration if duration is not None else None
+            self._remaining = requests
+            self._output = output
+            self._session += 1
+            self.active = True
+            session = self._session
+
+        threading.Thread(
+            target=self._sample, args=(session,), name="payload-profiler", daemon=True
+        ).start()
+
+    def stop(self):
+        """End the session, writing collapsed stacks to the output path if set"""
+        with self._lock:
+            if not self.active:
+                return
+            self.active = False
+            self._requests = {}
+            output = self._output
+
+        if output:
+            with open(output, "w") as f:
+                f.write(self.collapsed())
+
+    def begin_request(self, method, path):
+        profile = RequestProfile(method, path)
+        with self._lock:
+            self._requests[threading.get_ident()] = profile
+
+    def end_request(self, status):
+        with self._lock:
+            profile = self._requests.pop(threading.get_ident(), None)
+            if profile is None:
+                return
+            self.records.append(profile.to_dict(status, self.interval))
+            if self._remaining is not None:
+                self._remaining -= 1
+                done = self._remaining <= 0
+            else:
+                done = False
+        if done:
+            self.stop()
+
+    def _sample(self, session):
+        # A stopped session's thread may still be asleep when the next starts
+        while self.active and self._session == session:
+            if self._deadline is not None and time.monotonic() >= self._deadline:
+                self.stop()
+                break
+
+            frames = sys._current_frames()
+            with self._lock:
+                for thread_id, profile in self._requests.items():
+                    frame = frames.get(thread_id)
+                    if frame is None:
+                        continue
+                    profile.samples[_classify(frame)] += 1
+                    self.stacks[_collapse(f"{profile.method} {profile.path}", frame)] += 1
+            del frames
+
+            time.sleep(self.interval)
+
+    def collapsed(self):
+        """Collapsed stacks, one "stack count" line each"""
+        with self._lock:
+            return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def status(self):
+        with self._lock:
+            return {
+                "active": self.active,
+                "pid": os.getpid(),
+                "interval_ms": self.interval * 1000,
+                "seconds_left": (
+                    round(max(0, self._deadline - time.monotonic()), 3)
+                    if self.active and self._deadline is not None else None
+                ),
+                "requests_left": self._remaining if self.active else None,
+                "requests": list(self.records)
+            }
+
+
+# Singleton instance
+_profiler = None
+
+def get_profiler():
+    global _profiler
+    if _profiler is None:
+        _profiler = SamplingProfiler()
+    return _profiler
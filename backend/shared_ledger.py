@@ -0,0 +1,110 @@
+"""
+Simulated ledger kept in the flight store
+Lets several worker processes settle against one set of balances
+"""
+import os
+import struct
+import time
+
+from solders.signature import Signature
+from payload_sdk.ledger import InsufficientFundsError, LedgerError
+
+# Record id in the flight store; flight ids are namespaced so they can't clash
+LEDGER_ID = "ledger"
+
+# Same layout as payload_sdk.ledger: 8-byte nonce + 8-byte tx id, zero padded
+SIGNATURE = struct.Struct("<8sQ48x")
+
+
+class SharedLedger:
+    """
+    Balances, fees and the transaction count in one flight store record.
+
+    Each transfer is a single store.update, so with SqliteFlightStore every
+    worker process sees the same balances and transaction ids never repeat.
+    Covers what the backend uses from payload_sdk.SimulatedLedger (transfer,
+    signature, balances, slot, fee) and follows its rules: a payer who can't
+    cover the fee is rejected, one who can cover the fee but not the amount
+    pays the fee and gets a failed transaction. Individual transactions are
+    not kept; the flight's payment records hold them.
+    """
+
+    def __init__(self, store, fee_lamports=5000, slot_time=0.4):
+        self.store = store
+        self.fee_lamports = fee_lamports
+        self.slot_time = slot_time
+        state = store.update(LEDGER_ID, lambda state: dict(state), default=self._new_state)
+        self._nonce = bytes.fromhex(state["nonce"])
+        self._genesis = state["genesis"]
+
+    @staticmethod
+    def _new_state():
+        return {
+            "nonce": os.urandom(8).hex(),
+            # Wall clock, so every process agrees on the slot
+            "genesis": time.time(),
+            "balances": {},
+            "transactions": 0,
+            "fees_collected": 0
+        }
+
+    @property
+    def slot(self):
+        """Current slot, advancing every slot_time seconds"""
+        return int((time.time() - self._genesis) / self.slot_time)
+
+    def open_account(self, address, lamports):
+        """Fund an account the first time any worker sees it"""
+        def open_(state):
+            state["balances"].setdefault(address, lamports)
+        self.store.update(LEDGER_ID, open_, default=self._new_state)
+
+    def airdrop(self, address, lamports):
+        """Credit an account out of thin air"""
+        def credit(state):
+            balances = state["balances"]
+            balances[address] = balances.get(address, 0) + lamports
+        self.store.update(LEDGER_ID, credit, default=self._new_state)
+
+    def get_balance(self, address):
+        """Balance in lamports (0 for unknown accounts)"""
+        state = self.store.get(LEDGER_ID)
+        return state["balances"].get(address, 0) if state else 0
+
+    def transfer(self, source, destination, lamports, memo=None):
+        """
+        Move lamports from source to destination, charging the fee to source.
+        Returns the transaction id; raises like SimulatedLedger.transfer.
+        """
+        if lamports < 0:
+            raise LedgerError("Transfer amount must be non-negative")
+        fee = self.fee_lamports
+
+        def apply(state):
+            balances = state["balances"]
+            balance = balances.get(source, 0)
+            if balance < fee:
+                return None, balance
+            ok = balance >= fee + lamports
+            balances[source] = balance - fee - (lamports if ok else 0)
+            if ok:
+                balances[destination] = balances.get(destination, 0) + lamports
+            state["fees_collected"] += fee
+            tx_id = state["transactions"]
+            state["transactions"] += 1
+            return (tx_id, ok), balance
+
+        result, balance = self.store.update(LEDGER_ID, apply, default=self._new_state)
+        if result is None:
+            raise LedgerError(f"Insufficient funds for fee: {balance} < {fee} lamports")
+        tx_id, ok = result
+        if not ok:
+            raise InsufficientFundsError(
+                f"Insufficient funds: {balance - fee} < {lamports} lamports "
+                f"(tx {self.signature(tx_id)})"
+            )
+        return tx_id
+
+    def signature(self, tx_id):
+        """Base58 signature string for a transaction id"""
+        return str(Signature(SIGNATURE.pack(self._nonce, tx_id)))
@@ -2,6 +2,7 @@
 Solana client for PayLoad micropayments
 """
 import os
+import atexit
 import base58
 from solana.rpc.api import Client
 from solana.transaction import Transaction
@@ -11,14 +12,38 @@ from solders.system_program import TransferParams, transfer
 from spl.token.instructions import transfer_checked, TransferCheckedParams
 from spl.token.client import Token
 from spl.token.constants import TOKEN_PROGRAM_ID
+from payload_sdk.ledger import SimulatedLedger
+from flight_store import get_store
+from shared_ledger import SharedLedger
+from payload_sdk.recording import (
+    ProviderClient, RecordingProvider, ReplayProvider, process_path
+)
 import struct
 
 class PayLoadClient:
     def __init__(self):
         self.rpc_url = os.getenv('SOLANA_RPC_URL', 'https://api.devnet.solana.com')
-        self.client = Client(self.rpc_url)
         self.network = os.getenv('SOLANA_NETWORK', 'devnet')
         
+        # Optional RPC record/replay for deterministic performance runs
+        self.rpc_recorder = None
+        replay_path = os.getenv('RPC_REPLAY_PATH')
+        record_path = os.getenv('RPC_RECORD_PATH')
+        if replay_path:
+            self.client = ProviderClient(ReplayProvider(
+                replay_path,
+                latency_scale=float(os.getenv('RPC_REPLAY_LATENCY_SCALE', '1.0'))
+            ))
+            print(f"⏪ Replaying RPC traffic from {replay_path}")
+        elif record_path:
+            self.rpc_recorder = RecordingProvider(self.rpc_url)
+            self.client = ProviderClient(self.rpc_recorder)
+            # One file per worker process; the pid is resolved at exit
+            atexit.register(lambda: self.rpc_recorder.save(process_path(record_path)))
+            print(f"⏺  Recording RPC traffic to {process_path(record_path)}")
+        else:
+            self.client = Client(self.rpc_url)
+        
         # Load wallet from private key
         private_key = os.getenv('WALLET_PRIVATE_KEY')
         if private_key:
@@ -35,13 +60,35 @@ class PayLoadClient:
         self.recipient = Pubkey.from_string(
             os.getenv('RECIPIENT_WALLET', '11111111111111111111111111111111')
         )
+        # Who pays the wallet for deliveries (simulated in devnet mode)
+        self.customer = Pubkey.from_string(
+            os.getenv('CUSTOMER_WALLET', 'Customer11111111111111111111111111111111111')
+        )
         
         # USD1 has 6 decimals (like USDC)
         self.decimals = 6
+        
+        # Devnet demo mode settles against a simulated ledger: in-process by
+        # default, or in the shared flight store (FLIGHT_STORE_PATH) so every
+        # worker process sees the same balances
+        self.ledger = None
+        if self.network == 'devnet':
+            fee_lamports = int(os.getenv('SIM_FEE_LAMPORTS', '5000'))
+            slot_time = float(os.getenv('SIM_SLOT_TIME', '0.4'))
+            starting_lamports = int(os.getenv('SIM_STARTING_LAMPORTS', '1000000000'))
+            if os.getenv('FLIGHT_STORE_PATH'):
+                self.ledger = SharedLedger(get_store(), fee_lamports, slot_time)
+                # Funded once, however many workers share the wallet
+                self.ledger.open_account(str(self.wallet.pubkey()), starting_lamports)
+            else:
+                self.ledger = SimulatedLedger(fee_lamports=fee_lamports, slot_time=slot_time)
+                self.ledger.airdrop(str(self.wallet.pubkey()), starting_lamports)
     
     def get_balance(self):
         """Get SOL balance of payment wallet"""
         try:
+            if self.ledger is not None:
+                return self.ledger.get_balance(str(self.wallet.pubkey())) / 1e9
             response = self.client.get_balance(self.wallet.pubkey())
             return response.value / 1e9  # Convert lamports to SOL
         except Exception as e:
@@ -83,15 +130,12 @@ class PayLoadClient:
             # In production, this would be a real SPL token transfer
             
             if self.network == 'devnet':
-                # Simulate payment with tiny SOL transfer (or just log)
+                # Simulate payment with a tiny SOL transfer on the simulated ledger
                 # This proves the concept without needing real USD1
                 
-                # Convert to lamports (1 SOL = 1B lamports)
-                # We'll transfer equivalent lamports for demo
-                lamports = max(1, int(amount_usd * 1000))  # Minimal amount
+                lamports = self._demo_lamports(amount_usd)
                 
-                # For true demo mode, we can just simulate
-                # Uncomment below for real transactions:
+                # For real transactions, replace the ledger transfer with:
                 """
                 tx = Transaction()
                 tx.add(transfer(TransferParams(
@@ -104,20 +148,9 @@ class PayLoadClient:
                 signature = str(response.value)
                 """
                 
-                # Simulated response for demo
-                import hashlib
-                import time
-                fake_sig = hashlib.sha256(f"{time.time()}{amount_usd}{memo}".encode()).hexdigest()[:88]
-                
-                return {
-                    "success": True,
-                    "signature": fake_sig,
-                    "amount": amount_usd,
-                    "memo": memo,
-                    "network": self.network,
-                    "explorer_url": f"https://explorer.solana.com/tx/{fake_sig}?cluster={self.network}",
-                    "simulated": True  # Flag that this is demo mode
-                }
+                return self._ledger_transfer(
+                    str(self.wallet.pubkey()), str(self.recipient), lamports, amount_usd, memo
+                )
             
             else:
                 # Production: Real USD1 SPL token transfer
@@ -138,6 +171,61 @@ class PayLoadClient:
                 "error": str(e)
             }
     
+    def receive_micropayment(self, amount_usd: float, memo: str = ""):
+        """
+        Collect a payment into the wallet (e.g. a delivery fee)
+        
+        Args:
+            amount_usd: Amount in USD (e.g., 5.00)
+            memo: Description of payment
+            
+        Returns:
+            dict with transaction signature and details
+        """
+        try:
+            if self.network == 'devnet':
+                # The simulated customer is funded for exactly this payment
+                lamports = self._demo_lamports(amount_usd)
+                customer = str(self.customer)
+                self.ledger.airdrop(customer, lamports + self.ledger.fee_lamports)
+                return self._ledger_transfer(
+                    customer, str(self.wallet.pubkey()), lamports, amount_usd, memo
+                )
+            
+            return {
+                "success": False,
+                "error": "Production mode not yet implemented"
+            }
+        
+        except Exception as e:
+            return {
+                "success": False,
+                "error": str(e)
+            }
+    
+    @staticmethod
+    def _demo_lamports(amount_usd):
+        # Convert to lamports (1 SOL = 1B lamports)
+        # We'll transfer equivalent lamports for demo
+        return max(1, int(amount_usd * 1000))  # Minimal amount
+    
+    def _ledger_transfer(self, source, destination, lamports, amount_usd, memo):
+        """Transfer on the simulated ledger and describe it like an RPC result"""
+        tx_id = self.ledger.transfer(source, destination, lamports, memo)
+        signature = self.ledger.signature(tx_id)
+        
+        return {
+            "success": True,
+            "signature": signature,
+            "amount": amount_usd,
+            "memo": memo,
+            "network": self.network,
+            "slot": self.ledger.slot,
+            "fee_lamports": self.ledger.fee_lamports,
+            "explorer_url": f"https://explorer.solana.com/tx/{signature}?cluster={self.network}",
+            "simulated": True  # Flag that this is demo mode
+        }
+    
     def get_wallet_info(self):
         """Get wallet public info for display"""
         return {
@@ -0,0 +1,168 @@
+"""
+Batched telemetry decoding for PayLoad
+Compact binary position reports for many drones per request, with JSON fallback
+"""
+import math
+import struct
+import time
+
+from geo import valid_point
+
+# Batch layout (little-endian):
+#   header: magic "PLT1", uint32 record count
+#   record: uint32 flight id, float32 position, float64 unix timestamp
+MAGIC = b"PLT1"
+HEADER = struct.Struct("<4sI")
+RECORD = struct.Struct("<Ifd")
+
+# Geospatial batches share the header with magic "PLG1":
+#   record: uint32 flight id, float64 lat, float64 lon, float32 alt (m), float64 timestamp
+GEO_MAGIC = b"PLG1"
+GEO_RECORD = struct.Struct("<Iddfd")
+
+BINARY_CONTENT_TYPE = "application/octet-stream"
+
+# Accepted report timestamps relative to server time (seconds)
+MAX_CLOCK_SKEW = 300
+MAX_REPORT_AGE = 24 * 3600
+
+
+class TelemetryError(ValueError):
+    """Raised when a telemetry batch can't be decoded"""
+
+
+def check_timestamp(flight_id, timestamp, now):
+    """
+    Reject timestamps too far from server time; one report from the far
+    future would otherwise make every later report for the flight stale
+    """
+    if not now - MAX_REPORT_AGE <= timestamp <= now + MAX_CLOCK_SKEW:
+        raise TelemetryError(
+            f"Timestamp {timestamp} for flight {flight_id} is not within "
+            f"{MAX_REPORT_AGE}s before or {MAX_CLOCK_SKEW}s after server time"
+        )
+
+
+def check_update(flight_id, position, timestamp, now):
+    """Reject non-finite values, negative positions and implausible timestamps"""
+    if not (math.isfinite(position) and math.isfinite(timestamp)):
+        raise TelemetryError(f"Non-finite value in update for flight {flight_id}")
+    if position < 0:
+        raise TelemetryError(f"Negative position {position} for flight {flight_id}")
+    check_timestamp(flight_id, timestamp, now)
+    return flight_id, position, timestamp
+
+
+def check_geo_update(flight_id, point, timestamp, now):
+    """Reject non-finite values, lat/lon outside the globe and implausible timestamps"""
+    if not (valid_point(*point) and math.isfinite(timestamp)):
+        raise TelemetryError(f"Invalid point {point} or timestamp for flight {flight_id}")
+    check_timestamp(flight_id, timestamp, now)
+    return flight_id, point, timestamp
+
+
+def encode_batch(updates):
+    """
+    Encode (flight_id, position, timestamp) tuples into a binary batch.
+    Flight IDs must be unsigned 32-bit integers.
+    """
+    updates = list(updates)
+    parts = [HEADER.pack(MAGIC, len(updates))]
+    parts.extend(RECORD.pack(int(f), float(p), float(t)) for f, p, t in updates)
+    return b"".join(parts)
+
+
+def decode_batch(data, now=None):
+    """
+    Decode a binary batch into a list of (flight_id, position, timestamp).
+    Flight IDs are returned as strings so they share a namespace with JSON batches.
+    Timestamps are checked against now (default: current time).
+    """
+    now = time.time() if now is None else now
+    return [check_update(str(f), p, t, now) for f, p, t in _unpack(data, MAGIC, RECORD)]
+
+
+def encode_geo_batch(updates):
+    """
+    Encode (flight_id, (lat, lon, alt), timestamp) tuples into a binary geo batch.
+    """
+    updates = list(updates)
+    parts = [HEADER.pack(GEO_MAGIC, len(updates))]
+    parts.extend(
+        GEO_RECORD.pack(int(f), float(lat), float(lon), float(alt), float(t))
+        for f, (lat, lon, alt), t in updates
+    )
+    return b"".join(parts)
+
+
+def decode_geo_batch(data, now=None):
+    """
+    Decode a binary geo batch into a list of (flight_id, (lat, lon, alt), timestamp).
+    """
+    now = time.time() if now is None else now
+    return [
+        check_geo_update(str(f), (lat, lon, alt), t, now)
+        for f, lat, lon, alt, t in _unpack(data, GEO_MAGIC, GEO_RECORD)
+    ]
+
+
+def _unpack(data, magic, record):
+    if len(data) < HEADER.size:
+        raise TelemetryError("Batch too short")
+
+    found, count = HEADER.unpack_from(data)
+    if found != magic:
+        raise TelemetryError("Bad batch magic")
+
+    body = memoryview(data)[HEADER.size:]
+    if len(body) != count * record.size:
+        raise TelemetryError(
+            f"Expected {count} records ({count * record.size} bytes), got {len(body)} bytes"
+        )
+
+    return record.iter_unpack(body)
+
+
+def parse_json_batch(data, now=None):
+    """
+    Parse a JSON batch: {"updates": [{"flight_id", "position", "timestamp"}, ...]}
+    """
+    if not isinstance(data, dict) or not isinstance(data.get("updates"), list):
+        raise TelemetryError("Expected {\"updates\": [...]}")
+
+    now = time.time() if now is None else now
+    updates = []
+    for update in data["updates"]:
+        try:
+            updates.append(check_update(
+                str(update["flight_id"]),
+                float(update["position"]),
+                float(update["timestamp"]),
+                now
+            ))
+        except (KeyError, TypeError, ValueError) as e:
+            raise TelemetryError(f"Bad update {update!r}: {e}")
+    return updates
+
+
+def parse_json_geo_batch(data, now=None):
+    """
+    Parse a JSON geo batch:
+    {"updates": [{"flight_id", "lat", "lon", "alt", "timestamp"}, ...]}
+    """
+    if not isinstance(data, dict) or not isinstance(data.get("updates"), list):
+        raise TelemetryError("Expected {\"updates\": [...]}")
+
+    now = time.time() if now is None else now
+    updates = []
+    for update in data["updates"]:
+        try:
+            updates.append(check_geo_update(
+                str(update["flight_id"]),
+                (float(update["lat"]), float(update["lon"]), float(update.get("alt", 0))),
+                float(update["timestamp"]),
+                now
+            ))
+        except (KeyError, TypeError, ValueError) as e:
+            raise TelemetryError(f"Bad update {update!r}: {e}")
+    return updates
@@ -0,0 +1,114 @@
+"""
+Several worker processes sharing one SqliteFlightStore must charge each
+waypoint exactly once, however their requests interleave.
+"""
+import multiprocessing
+import os
+import random
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+WORKERS = 6
+REQUESTS_PER_WORKER = 40
+FLEET_FLIGHTS = ["1", "2", "3"]
+
+
+@pytest.fixture
+def app_module(tmp_path, monkeypatch):
+    monkeypatch.setenv("FLIGHT_STORE_PATH", str(tmp_path / "flights.db"))
+    monkeypatch.setenv("SOLANA_NETWORK", "devnet")
+    monkeypatch.delenv("WEB_CONCURRENCY", raising=False)
+
+    import flight_store
+    monkeypatch.setattr(flight_store, "_store", None)
+    import app
+    return app
+
+
+def _worker(seed):
+    import app
+
+    rng = random.Random(seed)
+    client = app.app.test_client()
+    start = time.time() - 3600
+    for i in range(REQUESTS_PER_WORKER):
+        position = rng.uniform(0, 110)
+        if i % 2:
+            client.post("/api/demo/advance", json={"position": position})
+        else:
+            client.post("/api/telemetry", json={"updates": [
+                {"flight_id": flight_id, "position": position, "timestamp": start + seed * 100 + i}
+                for flight_id in FLEET_FLIGHTS
+            ]})
+    os._exit(0)
+
+
+def _charged(state, app):
+    names = [payment["waypoint"] for payment in state["payments"]]
+    expected = [w["name"] for w in app.crossed_waypoints(0, state["drone_position"])]
+    return sorted(names), sorted(expected)
+
+
+def test_each_waypoint_charged_once_across_processes(app_module):
+    app = app_module
+    app.app.test_client().post("/api/demo/start")
+
+    ctx = multiprocessing.get_context("fork")
+    workers = [ctx.Process(target=_worker, args=(seed,)) for seed in range(1, WORKERS + 1)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=120)
+        assert worker.exitcode == 0
+
+    store = app.get_store()
+    flight_ids = [app.DEMO_FLIGHT] + [app.FLEET_PREFIX + f for f in FLEET_FLIGHTS]
+    signatures = []
+    for flight_id in flight_ids:
+        state = store.get(flight_id)
+        assert state is not None
+        names, expected = _charged(state, app)
+        assert names == expected, flight_id
+        assert len(names) == len(set(names)), flight_id
+        signatures.extend(payment["tx"]["signature"] for payment in state["payments"])
+
+    # Every worker settled against the one ledger in the shared store
+    from shared_ledger import LEDGER_ID
+    assert len(set(signatures)) == len(signatures)
+    assert store.get(LEDGER_ID)["transactions"] == len(signatures)
+
+
+@pytest.mark.parametrize("use_sqlite", [False, True])
+def test_failed_update_leaves_state_untouched(tmp_path, use_sqlite):
+    import flight_store
+
+    store = (
+        flight_store.SqliteFlightStore(str(tmp_path / "flights.db"))
+        if use_sqlite else flight_store.MemoryFlightStore()
+    )
+    store.put("f", {"unsettled": ["a", "b"], "position": 1})
+
+    def fail(state):
+        state.pop("unsettled")
+        state["position"] = 2
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        store.update("f", fail)
+    assert store.get("f") == {"unsettled": ["a", "b"], "position": 1}
+
+
+def test_bad_demo_position_is_rejected(app_module):
+    client = app_module.app.test_client()
+    client.post("/api/demo/start")
+    client.post("/api/demo/advance", json={"position": 10})
+
+    for position in ("abc", -5, float("nan"), [1]):
+        response = client.post("/api/demo/advance", json={"position": position})
+        assert response.status_code == 400
+
+    assert client.get("/api/demo/status").get_json()["drone_position"] == 10
@@ -0,0 +1,89 @@
+"""
+ZoneIndex grid queries must agree with testing every zone directly.
+"""
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from geo import ZoneIndex
+
+ORIGIN = (30.27, -97.745)
+# Roughly 1 km in degrees at the origin
+SPAN = 0.01
+
+
+def _random_zones(rng, count):
+    zones = []
+    for n in range(count):
+        lat = ORIGIN[0] + rng.uniform(-SPAN, SPAN)
+        lon = ORIGIN[1] + rng.uniform(-SPAN, SPAN)
+        band = {"min_alt": rng.choice([0, 30, 60]), "max_alt": rng.choice([90, 120, 1e9])}
+        if rng.random() < 0.5:
+            zone = {"shape": "circle", "center": [lat, lon], "radius": rng.uniform(5, 300)}
+        else:
+            size = rng.uniform(0.0002, 0.004)
+            zone = {"shape": "polygon", "points": [
+                [lat + rng.uniform(-size, size), lon + rng.uniform(-size, size)]
+                for _ in range(rng.randint(3, 6))
+            ]}
+        zones.append({**zone, **band, "type": "payment", "name": f"zone-{n}",
+                      "amount": 0.001, "description": ""})
+    return zones
+
+
+def _random_point(rng, reach):
+    return (
+        ORIGIN[0] + rng.uniform(-reach, reach),
+        ORIGIN[1] + rng.uniform(-reach, reach),
+        rng.uniform(0, 150)
+    )
+
+
+def _brute_entered(index, start, end):
+    ax, ay = index.projection.to_xy(start[0], start[1])
+    bx, by = index.projection.to_xy(end[0], end[1])
+    return [
+        zone.waypoint["name"] for zone in index.zones
+        if zone.crosses(ax, ay, start[2], bx, by, end[2])
+        and not zone.contains(ax, ay, start[2])
+    ]
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("cell_size", [40.0, 250.0, 2000.0])
+def test_entered_matches_brute_force(seed, cell_size):
+    rng = random.Random(seed)
+    index = ZoneIndex(_random_zones(rng, 40), origin=ORIGIN, cell_size=cell_size)
+
+    for _ in range(400):
+        # Mostly local hops, some long jumps from far outside the zone extent
+        reach = SPAN * rng.choice([0.2, 1.5, 50])
+        start = _random_point(rng, reach)
+        kind = rng.random()
+        if kind < 0.1:
+            end = start
+        elif kind < 0.2:
+            end = (start[0], start[1] + rng.uniform(-reach, reach), start[2])
+        elif kind < 0.3:
+            end = (start[0] + rng.uniform(-reach, reach), start[1], start[2])
+        else:
+            end = _random_point(rng, reach)
+
+        got = sorted(w["name"] for w in index.entered(start, end))
+        assert got == sorted(_brute_entered(index, start, end)), (start, end)
+
+
+@pytest.mark.parametrize("cell_size", [40.0, 250.0])
+def test_zones_at_matches_brute_force(cell_size):
+    rng = random.Random(99)
+    index = ZoneIndex(_random_zones(rng, 40), origin=ORIGIN, cell_size=cell_size)
+
+    for _ in range(1000):
+        lat, lon, alt = _random_point(rng, SPAN * 1.5)
+        x, y = index.projection.to_xy(lat, lon)
+        expected = sorted(z.waypoint["name"] for z in index.zones if z.contains(x, y, alt))
+        assert sorted(w["name"] for w in index.zones_at(lat, lon, alt)) == expected
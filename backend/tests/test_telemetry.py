@@ -0,0 +1,94 @@
+"""
+Telemetry timestamps are bounded by server time, and dropped reports and
+finished flights are reported back rather than silently ignored.
+"""
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from telemetry import TelemetryError, decode_batch, encode_batch, parse_json_batch
+
+
+@pytest.fixture
+def app_module(monkeypatch):
+    monkeypatch.delenv("FLIGHT_STORE_PATH", raising=False)
+    monkeypatch.delenv("WEB_CONCURRENCY", raising=False)
+    monkeypatch.setenv("SOLANA_NETWORK", "devnet")
+
+    import flight_store
+    monkeypatch.setattr(flight_store, "_store", None)
+    import app
+    return app
+
+
+def _post(client, *updates):
+    return client.post("/api/telemetry", json={"updates": [
+        {"flight_id": flight_id, "position": position, "timestamp": timestamp}
+        for flight_id, position, timestamp in updates
+    ]})
+
+
+@pytest.mark.parametrize("offset", [1e300, -1e300, 3600, -2 * 24 * 3600])
+def test_timestamps_far_from_server_time_are_rejected(offset):
+    now = time.time()
+    with pytest.raises(TelemetryError):
+        parse_json_batch({"updates": [{"flight_id": 1, "position": 5, "timestamp": now + offset}]})
+    with pytest.raises(TelemetryError):
+        decode_batch(encode_batch([(1, 5, now + offset)]))
+
+
+def test_future_report_gets_400_and_does_not_block_flight(app_module):
+    client = app_module.app.test_client()
+    now = time.time()
+
+    assert _post(client, ("t1", 5, 1e300)).status_code == 400
+    response = _post(client, ("t1", 15, now)).get_json()
+    assert response["processed"] == 1
+    assert [p["waypoint"] for p in response["triggered_payments"]] == ["Airspace Zone A"]
+
+
+def test_ignored_reports_are_listed_per_flight(app_module):
+    client = app_module.app.test_client()
+    now = time.time()
+
+    _post(client, ("t2", 10, now))
+    _post(client, ("t3", 100, now))
+    response = _post(client, ("t2", 20, now - 5), ("t3", 100, now + 1)).get_json()
+
+    assert response["processed"] == 0
+    assert response["stale"] == 1 and response["finished"] == 1
+    assert sorted(response["ignored"], key=lambda i: i["flight_id"]) == [
+        {"flight_id": "t2", "stale": 1, "finished": 0},
+        {"flight_id": "t3", "stale": 0, "finished": 1},
+    ]
+
+
+def test_finished_flight_id_restarts_after_retention(app_module, monkeypatch):
+    app = app_module
+    client = app.app.test_client()
+    now = time.time()
+
+    _post(client, ("t4", 100, now - 100))
+    assert _post(client, ("t4", 30, now - 50)).get_json()["finished"] == 1
+
+    monkeypatch.setattr(app, "FLIGHT_RETENTION", 0.0)
+    response = _post(client, ("t4", 30, now)).get_json()
+    assert response["processed"] == 1
+    state = client.get("/api/flights/t4").get_json()
+    assert state["running"] and state["drone_position"] == 30
+
+
+def test_idle_flights_are_swept_from_store(app_module, monkeypatch):
+    app = app_module
+    client = app.app.test_client()
+    _post(client, ("t5", 10, time.time()))
+    assert client.get("/api/flights/t5").status_code == 200
+
+    monkeypatch.setattr(app, "FLIGHT_RETENTION", -1.0)
+    monkeypatch.setattr(app, "_last_expiry", 0.0)
+    _post(client, ("other", 1, time.time()))
+    assert client.get("/api/flights/t5").status_code == 404
@@ -6,5 +6,9 @@ __version__ = "0.1.0"
 
 from .wallet import Wallet
 from .client import PayLoadClient
+from .keystore import Keystore
+from .ledger import SimulatedLedger
+from .recording import CallTimer, RecordingProvider, ReplayProvider
 
-__all__ = ["Wallet", "PayLoadClient", "__version__"]
+__all__ = ["Wallet", "Keystore", "PayLoadClient",
+           "RecordingProvider", "ReplayProvider", "CallTimer", "SimulatedLedger", "__version__"]
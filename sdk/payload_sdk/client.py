@@ -7,10 +7,13 @@ from dataclasses import dataclass
 from enum import Enum
 
 from solana.rpc.api import Client
+from solana.rpc.providers.http import HTTPProvider
 from solana.transaction import Transaction
 from solders.pubkey import Pubkey
 from solders.system_program import TransferParams, transfer
 
+from .ledger import SimulatedLedger
+from .recording import ProviderClient
 from .wallet import Wallet
 
 
@@ -72,16 +75,26 @@ class PayLoadClient:
         self,
         wallet: Wallet,
         network: Network = Network.DEVNET,
-        rpc_url: Optional[str] = None
+        rpc_url: Optional[str] = None,
+        provider: Optional[HTTPProvider] = None,
+        ledger: Optional[SimulatedLedger] = None
     ):
         self.wallet = wallet
         self.network = network
         self.rpc_url = rpc_url or self.RPC_URLS[network]
-        self._client = Client(self.rpc_url)
+        if provider is not None:
+            # e.g. RecordingProvider / ReplayProvider from payload_sdk.recording
+            self._client = ProviderClient(provider)
+        else:
+            self._client = Client(self.rpc_url)
+        # When set, payments and balances go to the simulated ledger instead of RPC
+        self.ledger = ledger
     
     def get_balance(self) -> float:
         """Get SOL balance in SOL (not lamports)."""
         try:
+            if self.ledger is not None:
+                return self.ledger.get_balance(self.wallet.address) / 1e9
             response = self._client.get_balance(self.wallet.pubkey)
             return response.value / 1e9
         except Exception as e:
@@ -113,6 +126,18 @@ class PayLoadClient:
             # Using 1 USD = 10000 lamports for demo visibility
             lamports = max(1000, int(amount * 10000))
             
+            if self.ledger is not None:
+                signature = self.ledger.signature(
+                    self.ledger.transfer(self.wallet.address, recipient, lamports, memo)
+                )
+                return PaymentResult(
+                    success=True,
+                    signature=signature,
+                    amount=amount,
+                    recipient=recipient,
+                    memo=memo
+                )
+            
             # Build transaction
             tx = Transaction()
             tx.add(transfer(TransferParams(
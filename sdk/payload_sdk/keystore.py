@@ -0,0 +1,220 @@
+"""
+PayLoad Keystore - HD-derived wallets for drone fleets
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, Iterator, Optional, Union
+
+from solders.keypair import Keypair
+from solders.pubkey import Pubkey
+
+from .wallet import Wallet
+
+
+# Solana's BIP-44 coin type; each drone's account index is split across
+# two hardened levels so it can carry 62 bits
+DERIVATION_PATH = "m/44'/501'/{hi}'/{lo}'"
+
+# Hardened indices are 31-bit per level
+_LEVEL_BITS = 31
+_LEVEL_MASK = 2 ** _LEVEL_BITS - 1
+MAX_ACCOUNT_INDEX = 2 ** (2 * _LEVEL_BITS) - 1
+
+_KEY_SIZE = 32
+
+DroneId = Union[str, int]
+
+
+def account_index(drone_id: DroneId) -> int:
+    """
+    Stable derivation index for a drone ID.
+
+    Hashes the ID into a 62-bit index, so a drone's address depends only
+    on the master seed and its ID, never on registration order. At 62 bits
+    a collision among a million drones has odds of about 1 in 10^7.
+    """
+    digest = hashlib.sha256(f"payload-drone:{drone_id}".encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") & MAX_ACCOUNT_INDEX
+
+
+def derivation_path(index: int) -> str:
+    """BIP-44 path for a 62-bit account index."""
+    return DERIVATION_PATH.format(hi=index >> _LEVEL_BITS, lo=index & _LEVEL_MASK)
+
+
+class Keystore:
+    """
+    Fleet keystore deriving one wallet per drone from a single master seed.
+
+    Each drone's account index is derived from its ID (see account_index),
+    so addresses are stable across restarts and registration order.
+    Secrets and public keys are packed into flat byte arrays (32 bytes per
+    drone) rather than one object per key, and a bounded LRU cache keeps
+    the most recently used Keypairs decoded so hot drones sign without
+    rebuilding their Keypair on every payment.
+
+    Usage:
+        keystore = Keystore.from_env("PAYLOAD_MASTER_SEED")
+
+        # Register drones (derivation happens once, here)
+        keystore.add("drone-0042")
+
+        # O(1) lookup by drone ID
+        wallet = keystore.wallet("drone-0042")
+        client = PayLoadClient(wallet)
+    """
+
+    def __init__(self, seed: bytes, cache_size: int = 1024):
+        if len(seed) < 16:
+            raise ValueError("Master seed must be at least 16 bytes")
+        if cache_size < 0:
+            raise ValueError("cache_size must be non-negative")
+
+        self._seed = bytes(seed)
+        self._cache_size = cache_size
+        self._secrets = bytearray()
+        self._pubkeys = bytearray()
+        self._index: Dict[Hashable, int] = {}
+        self._owners: Dict[int, Hashable] = {}
+        self._cache: "OrderedDict[int, Keypair]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def create(cls, cache_size: int = 1024) -> "Keystore":
+        """Create a keystore with a new random 64-byte master seed."""
+        return cls(os.urandom(64), cache_size=cache_size)
+
+    @classmethod
+    def from_seed_phrase(
+        cls,
+        phrase: str,
+        passphrase: str = "",
+        cache_size: int = 1024
+    ) -> "Keystore":
+        """Load keystore from a BIP-39 mnemonic (same seed as Solana wallets)."""
+        seed = hashlib.pbkdf2_hmac(
+            "sha512",
+            " ".join(phrase.split()).encode("utf-8"),
+            ("mnemonic" + passphrase).encode("utf-8"),
+            2048
+        )
+        return cls(seed, cache_size=cache_size)
+
+    @classmethod
+    def from_env(
+        cls,
+        env_var: str = "PAYLOAD_MASTER_SEED",
+        cache_size: int = 1024
+    ) -> "Keystore":
+        """Load keystore from a hex-encoded master seed in an environment variable."""
+        seed = os.environ.get(env_var)
+        if not seed:
+            raise ValueError(f"Environment variable {env_var} not set")
+        return cls(bytes.fromhex(seed), cache_size=cache_size)
+
+    def add(self, drone_id: DroneId, index: Optional[int] = None) -> str:
+        """
+        Register a drone, deriving its keypair once.
+
+        The account index defaults to account_index(drone_id). Pass index
+        explicitly only to pin a drone to an existing wallet. Registering
+        the same ID twice is a no-op.
+
+        Returns:
+            The drone's wallet address
+
+        Raises:
+            ValueError: if the index is out of range or already used by
+                another drone
+        """
+        if not isinstance(drone_id, (str, int)):
+            raise TypeError(f"Drone IDs must be str or int, got {type(drone_id).__name__}")
+        if index is None:
+            index = account_index(drone_id)
+        if not 0 <= index <= MAX_ACCOUNT_INDEX:
+            raise ValueError(f"Account index {index} out of range")
+
+        with self._lock:
+            if drone_id in self._index:
+                return self._address_at(self._index[drone_id])
+
+            owner = self._owners.get(index)
+            if owner is not None:
+                raise ValueError(
+                    f"Account index {index} for {drone_id!r} collides with {owner!r}"
+                )
+
+            keypair = Keypair.from_seed_and_derivation_path(
+                self._seed,
+                derivation_path(index)
+            )
+            slot = len(self._index)
+            self._secrets += bytes(keypair)[:_KEY_SIZE]
+            self._pubkeys += bytes(keypair.pubkey())
+            self._index[drone_id] = slot
+            self._owners[index] = drone_id
+            self._remember(slot, keypair)
+            return str(keypair.pubkey())
+
+    def pubkey(self, drone_id: Hashable) -> Pubkey:
+        """Get a drone's public key without touching its secret."""
+        index = self._lookup(drone_id)
+        return Pubkey.from_bytes(self._pubkey_bytes(index))
+
+    def address(self, drone_id: Hashable) -> str:
+        """Get a drone's wallet address as string."""
+        return str(self.pubkey(drone_id))
+
+    def keypair(self, drone_id: Hashable) -> Keypair:
+        """Get a drone's keypair (for signing), decoding it on cache miss."""
+        index = self._lookup(drone_id)
+        with self._lock:
+            keypair = self._cache.get(index)
+            if keypair is not None:
+                self._cache.move_to_end(index)
+                return keypair
+
+            start = index * _KEY_SIZE
+            keypair = Keypair.from_seed(bytes(self._secrets[start:start + _KEY_SIZE]))
+            self._remember(index, keypair)
+            return keypair
+
+    def wallet(self, drone_id: Hashable) -> Wallet:
+        """Get a Wallet for a drone, backed by the cached keypair."""
+        return Wallet(self.keypair(drone_id))
+
+    def _lookup(self, drone_id: Hashable) -> int:
+        try:
+            return self._index[drone_id]
+        except KeyError:
+            raise KeyError(f"Unknown drone: {drone_id!r}") from None
+
+    def _pubkey_bytes(self, index: int) -> bytes:
+        start = index * _KEY_SIZE
+        return bytes(self._pubkeys[start:start + _KEY_SIZE])
+
+    def _address_at(self, index: int) -> str:
+        return str(Pubkey.from_bytes(self._pubkey_bytes(index)))
+
+    def _remember(self, index: int, keypair: Keypair) -> None:
+        # Caller holds the lock
+        if self._cache_size == 0:
+            return
+        self._cache[index] = keypair
+        self._cache.move_to_end(index)
+        while len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, drone_id: Hashable) -> bool:
+        return drone_id in self._index
+
+    def __iter__(self) -> Iterator[Hashable]:
+        return iter(list(self._index))
+
+    def __repr__(self) -> str:
+        return f"Keystore(drones={len(self)}, cached={len(self._cache)})"
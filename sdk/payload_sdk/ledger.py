@@ -0,0 +1,266 @@
+"""
+PayLoad Simulated Ledger - In-process stand-in for a Solana cluster
+"""
+import os
+import struct
+import threading
+import time
+from array import array
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from solders.signature import Signature
+
+
+# Solana's base fee per signature
+DEFAULT_FEE_LAMPORTS = 5000
+DEFAULT_SLOT_TIME = 0.4
+
+COMMITMENTS = ("processed", "confirmed", "finalized")
+
+# 8-byte ledger nonce + 8-byte transaction id, zero padded to 64 bytes
+_SIGNATURE = struct.Struct("<8sQ48x")
+
+# transfer_many result for a transfer whose payer couldn't cover the fee
+REJECTED = -1
+
+
+class LedgerError(Exception):
+    """Raised when the simulated ledger rejects a transaction."""
+
+
+class InsufficientFundsError(LedgerError):
+    """Raised when the payer can't cover the transfer plus fee."""
+
+
+class SimulatedLedger:
+    """
+    In-process ledger for offline simulation and load tests.
+
+    Tracks lamport balances per account, charges a fee per transaction,
+    issues unique signatures and models slot-based confirmation timing.
+    Accounts and transactions are kept in flat arrays so millions of
+    simulated payments stay cheap; signature strings are only rendered
+    when asked for.
+
+    Like a real cluster, a payer who can cover the fee but not the amount
+    still pays the fee and the failed transaction is recorded.
+
+    Usage:
+        ledger = SimulatedLedger()
+        ledger.airdrop(wallet.address, 1_000_000_000)
+
+        client = PayLoadClient(wallet, ledger=ledger)
+        result = client.pay(0.003, recipient, memo="Airspace fee")
+
+        ledger.confirmation_status(result.signature)  # "processed"
+    """
+
+    def __init__(
+        self,
+        fee_lamports: int = DEFAULT_FEE_LAMPORTS,
+        slot_time: float = DEFAULT_SLOT_TIME,
+        confirmation_slots: int = 1,
+        finalization_slots: int = 32,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.fee_lamports = fee_lamports
+        self.slot_time = slot_time
+        self.confirmation_slots = confirmation_slots
+        self.finalization_slots = finalization_slots
+        self.fees_collected = 0
+
+        self._clock = clock
+        self._genesis = clock()
+        self._nonce = os.urandom(8)
+        self._lock = threading.Lock()
+
+        self._accounts: Dict[str, int] = {}
+        self._balances: List[int] = []
+
+        # One entry per transaction, indexed by transaction id
+        self._tx_slot = array("q")
+        self._tx_source = array("l")
+        self._tx_destination = array("l")
+        self._tx_lamports = array("q")
+        self._tx_ok = array("b")
+        self._tx_memo: List[Optional[str]] = []
+
+    @property
+    def slot(self) -> int:
+        """Current slot, advancing every slot_time seconds."""
+        return int((self._clock() - self._genesis) / self.slot_time)
+
+    def _account(self, address: str) -> int:
+        # Caller holds the lock
+        index = self._accounts.get(address)
+        if index is None:
+            index = self._accounts[address] = len(self._balances)
+            self._balances.append(0)
+        return index
+
+    def airdrop(self, address: str, lamports: int) -> None:
+        """Credit an account out of thin air."""
+        with self._lock:
+            self._balances[self._account(address)] += lamports
+
+    def get_balance(self, address: str) -> int:
+        """Balance in lamports (0 for unknown accounts)."""
+        index = self._accounts.get(address)
+        return 0 if index is None else self._balances[index]
+
+    def transfer(
+        self,
+        source: str,
+        destination: str,
+        lamports: int,
+        memo: Optional[str] = None
+    ) -> int:
+        """
+        Move lamports from source to destination, charging the fee to source.
+
+        Returns:
+            Transaction id; see signature() for the signature string
+
+        Raises:
+            LedgerError: if source can't pay the fee (nothing is recorded)
+            InsufficientFundsError: if source can pay the fee but not the
+                amount (the fee is charged and a failed transaction recorded)
+        """
+        if lamports < 0:
+            raise LedgerError("Transfer amount must be non-negative")
+
+        fee = self.fee_lamports
+        slot = self.slot
+        with self._lock:
+            src = self._account(source)
+            dst = self._account(destination)
+            balance = self._balances[src]
+
+            if balance < fee:
+                raise LedgerError(f"Insufficient funds for fee: {balance} < {fee} lamports")
+
+            ok = balance >= fee + lamports
+            self._balances[src] = balance - fee - (lamports if ok else 0)
+            if ok:
+                self._balances[dst] += lamports
+            self.fees_collected += fee
+
+            tx_id = len(self._tx_slot)
+            self._tx_slot.append(slot)
+            self._tx_source.append(src)
+            self._tx_destination.append(dst)
+            self._tx_lamports.append(lamports)
+            self._tx_ok.append(ok)
+            self._tx_memo.append(memo)
+
+        if not ok:
+            raise InsufficientFundsError(
+                f"Insufficient funds: {balance - fee} < {lamports} lamports "
+                f"(tx {self.signature(tx_id)})"
+            )
+        return tx_id
+
+    def transfer_many(
+        self,
+        transfers: Iterable[Tuple[str, str, int]],
+        memo: Optional[str] = None
+    ) -> Sequence[int]:
+        """
+        Apply (source, destination, lamports) transfers in one lock hold.
+
+        Transfers the payer can't afford are recorded as failed, and ones
+        whose payer can't even pay the fee are rejected, rather than
+        raising. A negative amount raises LedgerError before anything is
+        applied.
+
+        Returns:
+            One transaction id per input, in order, or REJECTED where the
+            fee couldn't be paid; check get_transaction() for success
+        """
+        transfers = list(transfers)
+        if any(lamports < 0 for _, _, lamports in transfers):
+            raise LedgerError("Transfer amount must be non-negative")
+
+        fee = self.fee_lamports
+        slot = self.slot
+        tx_ids = array("q")
+        with self._lock:
+            balances = self._balances
+            account = self._account
+            for source, destination, lamports in transfers:
+                src = account(source)
+                dst = account(destination)
+                balance = balances[src]
+                if balance < fee:
+                    tx_ids.append(REJECTED)
+                    continue
+                ok = balance >= fee + lamports
+                balances[src] = balance - fee - (lamports if ok else 0)
+                if ok:
+                    balances[dst] += lamports
+                self.fees_collected += fee
+                tx_ids.append(len(self._tx_slot))
+                self._tx_slot.append(slot)
+                self._tx_source.append(src)
+                self._tx_destination.append(dst)
+                self._tx_lamports.append(lamports)
+                self._tx_ok.append(ok)
+                self._tx_memo.append(memo)
+        return tx_ids
+
+    def signature(self, tx_id: int) -> str:
+        """Base58 signature string for a transaction id."""
+        return str(Signature(_SIGNATURE.pack(self._nonce, tx_id)))
+
+    def tx_id(self, signature: str) -> int:
+        """Transaction id for a signature issued by this ledger."""
+        try:
+            nonce, tx_id = _SIGNATURE.unpack(bytes(Signature.from_string(signature)))
+        except ValueError:
+            raise LedgerError(f"Malformed signature: {signature!r}") from None
+        if nonce != self._nonce or tx_id >= len(self._tx_slot):
+            raise LedgerError(f"Unknown signature: {signature}")
+        return tx_id
+
+    def get_transaction(self, signature: str) -> Dict:
+        """Slot, amount, success and confirmation status of a transaction."""
+        tx_id = self.tx_id(signature)
+        return {
+            "signature": signature,
+            "slot": self._tx_slot[tx_id],
+            "lamports": self._tx_lamports[tx_id],
+            "memo": self._tx_memo[tx_id],
+            "fee": self.fee_lamports,
+            "success": bool(self._tx_ok[tx_id]),
+            "confirmation_status": self._status(tx_id)
+        }
+
+    def confirmation_status(self, signature: str) -> str:
+        """"processed", "confirmed" or "finalized" as of the current slot."""
+        return self._status(self.tx_id(signature))
+
+    def _status(self, tx_id: int) -> str:
+        age = self.slot - self._tx_slot[tx_id]
+        if age >= self.finalization_slots:
+            return "finalized"
+        if age >= self.confirmation_slots:
+            return "confirmed"
+        return "processed"
+
+    def wait_for_confirmation(self, signature: str, commitment: str = "confirmed") -> None:
+        """Block until a transaction reaches the given commitment."""
+        if commitment not in COMMITMENTS:
+            raise ValueError(f"Unknown commitment {commitment!r}")
+        tx_id = self.tx_id(signature)
+        slots = {"processed": 0, "confirmed": self.confirmation_slots,
+                 "finalized": self.finalization_slots}[commitment]
+        target = self._genesis + (self._tx_slot[tx_id] + slots) * self.slot_time
+        delay = target - self._clock()
+        if delay > 0:
+            time.sleep(delay)
+
+    def __len__(self) -> int:
+        return len(self._tx_slot)
+
+    def __repr__(self) -> str:
+        return f"SimulatedLedger(accounts={len(self._balances)}, transactions={len(self)}, slot={self.slot})"
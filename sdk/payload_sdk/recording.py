@@ -0,0 +1,393 @@
+"""
+PayLoad RPC Recording - Record and replay Solana RPC traffic
+"""
+import gzip
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import httpx
+from solana.rpc.api import Client
+from solana.rpc.commitment import Commitment
+from solana.rpc.providers.http import HTTPProvider
+from solders.rpc.requests import Body
+
+
+FORMAT_VERSION = 1
+
+
+class ReplayMissError(LookupError):
+    """Raised when a replayed client sends a request that was never recorded."""
+
+
+class ReplayedRpcError(httpx.HTTPError):
+    """
+    A recorded RPC failure (timeout, connection or HTTP error) served back.
+    Subclasses httpx.HTTPError so solana-py wraps it in SolanaRpcException,
+    exactly as it did for the original failure.
+    """
+
+
+@dataclass
+class Exchange:
+    """One recorded RPC request/response pair (or failure)."""
+    method: str
+    request: str
+    response: str
+    latency: float
+    offset: float = 0.0
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def _request_key(payload: Union[Body, Tuple[Body, ...]]) -> Tuple[str, str]:
+    """
+    Stable (method, request) key for a request, ignoring the JSON-RPC id.
+
+    The id comes from a per-provider counter, so it differs between the
+    recorded run and the replay even when the request is otherwise identical.
+    """
+    bodies = payload if isinstance(payload, tuple) else (payload,)
+    stripped = []
+    for body in bodies:
+        data = json.loads(body.to_json())
+        data.pop("id", None)
+        stripped.append(data)
+
+    if isinstance(payload, tuple):
+        method = "batch:" + ",".join(d.get("method", "") for d in stripped)
+        return method, json.dumps(stripped, sort_keys=True, separators=(",", ":"))
+    return stripped[0].get("method", ""), json.dumps(stripped[0], sort_keys=True, separators=(",", ":"))
+
+
+class ProviderClient(Client):
+    """
+    solana-py Client that sends its requests through the given provider.
+
+    Client only builds its own HTTPProvider, so this is the one place the
+    provider is swapped in (e.g. a RecordingProvider or ReplayProvider).
+    """
+
+    def __init__(self, provider: HTTPProvider, commitment: Optional[Commitment] = None):
+        super().__init__(provider.endpoint_uri, commitment=commitment)
+        self._provider = provider
+
+
+def process_path(path: str) -> str:
+    """
+    path with the current pid before its extension
+    ("flight.rpc.gz" -> "flight.rpc.1234.gz"), so several worker
+    processes saving at exit don't overwrite each other's file.
+    """
+    root, ext = os.path.splitext(path)
+    return f"{root}.{os.getpid()}{ext}"
+
+
+def save_recording(path: str, exchanges: Iterable[Exchange]) -> None:
+    """Write exchanges to a gzip-compressed JSON-lines file."""
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        f.write(json.dumps({"version": FORMAT_VERSION}) + "\n")
+        for exchange in exchanges:
+            f.write(json.dumps(exchange.to_dict(), separators=(",", ":")) + "\n")
+
+
+def load_recording(path: str) -> List[Exchange]:
+    """Read exchanges written by save_recording."""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        header = json.loads(f.readline())
+        if header.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported recording version: {header.get('version')}")
+        return [Exchange(**json.loads(line)) for line in f if line.strip()]
+
+
+class RecordingProvider(HTTPProvider):
+    """
+    HTTP provider that forwards to a real RPC node and records every exchange.
+
+    Usage:
+        recorder = RecordingProvider("https://api.devnet.solana.com")
+        client = PayLoadClient(wallet, provider=recorder)
+
+        # ... fly ...
+
+        recorder.save("flight.rpc.gz")
+    """
+
+    def __init__(
+        self,
+        endpoint: Optional[str] = None,
+        timeout: float = 10,
+        extra_headers: Optional[Dict[str, str]] = None
+    ):
+        super().__init__(endpoint, extra_headers=extra_headers, timeout=timeout)
+        self.exchanges: List[Exchange] = []
+        self._started = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def make_request_unparsed(self, body: Body) -> str:
+        start = time.perf_counter()
+        try:
+            raw = super().make_request_unparsed(body)
+        except Exception as e:
+            # Timeouts and HTTP errors are the timing problems worth replaying
+            self._record(body, "", start, error=f"{type(e).__name__}: {e}")
+            raise
+        self._record(body, raw, start)
+        return raw
+
+    def make_batch_request_unparsed(self, reqs: Tuple[Body, ...]) -> str:
+        start = time.perf_counter()
+        try:
+            raw = super().make_batch_request_unparsed(reqs)
+        except Exception as e:
+            self._record(tuple(reqs), "", start, error=f"{type(e).__name__}: {e}")
+            raise
+        self._record(tuple(reqs), raw, start)
+        return raw
+
+    def _record(
+        self,
+        payload: Union[Body, Tuple[Body, ...]],
+        raw: str,
+        start: float,
+        error: Optional[str] = None
+    ) -> None:
+        latency = time.perf_counter() - start
+        method, request = _request_key(payload)
+        with self._lock:
+            self.exchanges.append(Exchange(
+                method=method,
+                request=request,
+                response=raw,
+                latency=latency,
+                offset=start - self._started,
+                error=error
+            ))
+
+    def save(self, path: str) -> None:
+        """Write everything recorded so far to path."""
+        with self._lock:
+            exchanges = list(self.exchanges)
+        save_recording(path, exchanges)
+
+
+class ReplayProvider(HTTPProvider):
+    """
+    Offline provider that serves recorded responses back in order.
+
+    Requests are matched on method and params (the JSON-RPC id is ignored).
+    If the exact request was not recorded, the next unused response for the
+    same method is served instead, so small differences such as a changed
+    memo don't break a replay. Each response is delayed by its recorded
+    latency multiplied by latency_scale (0 replays as fast as possible).
+    Recorded failures are raised again as ReplayedRpcError after their
+    recorded latency.
+
+    served holds the recorded exchanges in the order they were used;
+    measured holds what this run actually observed for each call (wall
+    time inside the provider), which can be saved and compared with
+    compare_latency. For end-to-end timings of the code under test, wrap
+    its calls in a CallTimer.
+
+    Usage:
+        replay = ReplayProvider("flight.rpc.gz", latency_scale=1.0)
+        client = PayLoadClient(wallet, provider=replay)
+    """
+
+    def __init__(
+        self,
+        recording: Union[str, Iterable[Exchange]],
+        latency_scale: float = 1.0
+    ):
+        super().__init__("http://replay.invalid")
+        if latency_scale < 0:
+            raise ValueError("latency_scale must be non-negative")
+
+        exchanges = load_recording(recording) if isinstance(recording, str) else list(recording)
+        self.latency_scale = latency_scale
+        self.served: List[Exchange] = []
+        self.measured: List[Exchange] = []
+        self._started = time.perf_counter()
+        self._by_request: Dict[Tuple[str, str], Deque[Exchange]] = defaultdict(deque)
+        self._by_method: Dict[str, Deque[Exchange]] = defaultdict(deque)
+        self._used = set()
+        for exchange in exchanges:
+            self._by_request[(exchange.method, exchange.request)].append(exchange)
+            self._by_method[exchange.method].append(exchange)
+        self._lock = threading.Lock()
+
+    def make_request_unparsed(self, body: Body) -> str:
+        return self._serve(body)
+
+    def make_batch_request_unparsed(self, reqs: Tuple[Body, ...]) -> str:
+        return self._serve(tuple(reqs))
+
+    def is_connected(self) -> bool:
+        return True
+
+    def _serve(self, payload: Union[Body, Tuple[Body, ...]]) -> str:
+        start = time.perf_counter()
+        method, request = _request_key(payload)
+        with self._lock:
+            exchange = self._take(self._by_request[(method, request)])
+            if exchange is None:
+                exchange = self._take(self._by_method[method])
+            if exchange is None:
+                raise ReplayMissError(f"No recorded response for {method}: {request}")
+            self.served.append(exchange)
+
+        if self.latency_scale:
+            time.sleep(exchange.latency * self.latency_scale)
+
+        with self._lock:
+            self.measured.append(Exchange(
+                method=method,
+                request=request,
+                response=exchange.response,
+                latency=time.perf_counter() - start,
+                offset=start - self._started,
+                error=exchange.error
+            ))
+
+        if exchange.error is not None:
+            raise ReplayedRpcError(exchange.error)
+        return exchange.response
+
+    def save(self, path: str) -> None:
+        """Write the timings measured during this replay to path."""
+        with self._lock:
+            measured = list(self.measured)
+        save_recording(path, measured)
+
+    def _take(self, queue: Deque[Exchange]) -> Optional[Exchange]:
+        # Both indexes share exchanges; skip ones already served via the other
+        while queue:
+            exchange = queue.popleft()
+            if id(exchange) not in self._used:
+                self._used.add(id(exchange))
+                return exchange
+        return None
+
+
+class CallTimer:
+    """
+    End-to-end timings of named operations, stored as Exchanges so a
+    replayed run can be saved and compared against a baseline run.
+
+    Usage:
+        timer = CallTimer()
+        client = PayLoadClient(wallet, provider=ReplayProvider("flight.rpc.gz"))
+
+        with timer.measure("pay"):
+            client.pay(0.003, recipient)
+
+        timer.save("candidate.timings.gz")
+        regressions = compare_latency(load_recording("baseline.timings.gz"), timer.exchanges)
+    """
+
+    def __init__(self):
+        self.exchanges: List[Exchange] = []
+        self._started = time.perf_counter()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def measure(self, name: str) -> Iterator[None]:
+        """Time the enclosed block under name."""
+        start = time.perf_counter()
+        error = None
+        try:
+            yield
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            self.add(name, start, error)
+
+    def add(self, name: str, start: float, error: Optional[str] = None) -> None:
+        """Record a call under name that began at start (a perf_counter value)."""
+        latency = time.perf_counter() - start
+        with self._lock:
+            self.exchanges.append(Exchange(
+                method=name,
+                request="",
+                response="",
+                latency=latency,
+                offset=start - self._started,
+                error=error
+            ))
+
+    def save(self, path: str) -> None:
+        """Write the measured timings to path."""
+        with self._lock:
+            exchanges = list(self.exchanges)
+        save_recording(path, exchanges)
+
+
+def latency_summary(exchanges: Iterable[Exchange]) -> Dict[str, Dict[str, float]]:
+    """
+    Per-method latency statistics for a recording.
+
+    Returns:
+        dict of method -> {count, total, mean, p50, p95, max} (seconds)
+    """
+    by_method: Dict[str, List[float]] = defaultdict(list)
+    for exchange in exchanges:
+        by_method[exchange.method].append(exchange.latency)
+
+    summary = {}
+    for method, latencies in by_method.items():
+        latencies.sort()
+        n = len(latencies)
+        summary[method] = {
+            "count": n,
+            "total": sum(latencies),
+            "mean": sum(latencies) / n,
+            "p50": latencies[(n - 1) // 2],
+            "p95": latencies[min(n - 1, int(n * 0.95))],
+            "max": latencies[-1]
+        }
+    return summary
+
+
+def compare_latency(
+    baseline: Iterable[Exchange],
+    candidate: Iterable[Exchange],
+    tolerance: float = 0.2,
+    stat: str = "p95"
+) -> List[Dict[str, Any]]:
+    """
+    Compare two recordings method by method.
+
+    Args:
+        baseline: Exchanges from the reference run
+        candidate: Exchanges from the run under test
+        tolerance: Allowed relative slowdown (0.2 = 20%)
+        stat: Statistic from latency_summary to compare
+
+    Returns:
+        List of regressions, empty if the candidate is within tolerance.
+        Methods missing from the baseline are reported with baseline=None.
+    """
+    base = latency_summary(baseline)
+    cand = latency_summary(candidate)
+
+    regressions = []
+    for method, stats in sorted(cand.items()):
+        reference = base.get(method)
+        if reference is None:
+            regressions.append({"method": method, "baseline": None, "candidate": stats[stat]})
+        elif stats[stat] > reference[stat] * (1 + tolerance):
+            regressions.append({
+                "method": method,
+                "baseline": reference[stat],
+                "candidate": stats[stat],
+                "ratio": stats[stat] / reference[stat] if reference[stat] else float("inf")
+            })
+    return regressions
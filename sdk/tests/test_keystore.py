@@ -0,0 +1,38 @@
+"""
+Keystore addresses depend only on the seed and drone ID, and fleet-sized
+registrations don't collide.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from payload_sdk.keystore import Keystore, MAX_ACCOUNT_INDEX, account_index
+
+SEED = bytes(range(64))
+FLEET_SIZE = 100_000
+
+
+def test_large_fleet_registers_without_collisions():
+    keystore = Keystore(SEED, cache_size=16)
+    for n in range(FLEET_SIZE):
+        keystore.add(f"drone-{n:06d}")
+
+    assert len(keystore) == FLEET_SIZE
+    indices = {account_index(f"drone-{n:06d}") for n in range(FLEET_SIZE)}
+    assert len(indices) == FLEET_SIZE
+    assert max(indices) <= MAX_ACCOUNT_INDEX
+
+
+def test_address_independent_of_registration_order():
+    ids = [f"drone-{n}" for n in range(50)] + list(range(50))
+
+    forward = Keystore(SEED)
+    backward = Keystore(SEED)
+    for drone_id in ids:
+        forward.add(drone_id)
+    for drone_id in reversed(ids):
+        backward.add(drone_id)
+
+    for drone_id in ids:
+        assert forward.address(drone_id) == backward.address(drone_id)
@@ -0,0 +1,40 @@
+"""
+SimulatedLedger batch transfers map back to their inputs.
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from payload_sdk.ledger import REJECTED, LedgerError, SimulatedLedger
+
+
+def test_transfer_many_returns_one_result_per_input():
+    ledger = SimulatedLedger(fee_lamports=10)
+    ledger.airdrop("a", 100)
+
+    tx_ids = ledger.transfer_many([("x", "y", 1), ("a", "y", 50), ("a", "y", 500), ("z", "y", 1)])
+
+    assert tx_ids[0] == REJECTED and tx_ids[3] == REJECTED
+    ok = ledger.get_transaction(ledger.signature(tx_ids[1]))
+    failed = ledger.get_transaction(ledger.signature(tx_ids[2]))
+    assert ok["success"] and ok["lamports"] == 50
+    assert not failed["success"] and failed["lamports"] == 500
+    assert ledger.get_balance("a") == 100 - 10 - 50 - 10
+    assert ledger.get_balance("y") == 50
+
+
+def test_transfer_many_rejects_negative_amounts_up_front():
+    ledger = SimulatedLedger()
+    ledger.airdrop("a", 10 ** 6)
+    with pytest.raises(LedgerError):
+        ledger.transfer_many([("a", "b", 5), ("a", "b", -5)])
+    assert len(ledger) == 0 and ledger.get_balance("a") == 10 ** 6
+
+
+@pytest.mark.parametrize("signature", ["not-a-signature", "1" * 88])
+def test_malformed_signature_raises_ledger_error(signature):
+    with pytest.raises(LedgerError):
+        SimulatedLedger().tx_id(signature)